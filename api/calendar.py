@@ -1,37 +1,44 @@
-import requests
 import json
 
-BASE = "https://api.responsible-nlp.net/calendar.php?calenderid=1187019"
+from api.client import API_ROOT, client
+from utils.tracing import traced
 
+BASE = f"{API_ROOT}/calendar.php?calenderid=1187019"
+
+@traced("api.calendar")
 def create_event(event: dict) -> dict:
-    r = requests.post(BASE, headers={"Content-Type": "application/json"}, data=json.dumps(event), timeout=15)
+    r = client.post(BASE, headers={"Content-Type": "application/json"}, data=json.dumps(event), endpoint="calendar.create")
     r.raise_for_status()
     return r.json()
 
+@traced("api.calendar")
 def list_events() -> dict:
-    r = requests.get(BASE, timeout=15)
+    r = client.get(BASE, endpoint="calendar.list")
     r.raise_for_status()
     return r.json()
 
+@traced("api.calendar")
 def get_event(event_id: int) -> dict:
-    r = requests.get(f"{BASE}?id={event_id}", timeout=15)
+    r = client.get(f"{BASE}?id={event_id}", endpoint="calendar.get")
     r.raise_for_status()
     return r.json()
 
+@traced("api.calendar")
 def update_event(event_id: int, patch: dict) -> dict:
-    r = requests.put(
+    r = client.put(
         f"{BASE}&id={event_id}",
         headers={"Content-Type": "application/json"},
         data=json.dumps(patch),
-        timeout=15,
+        endpoint="calendar.update",
     )
     r.raise_for_status()
     return r.json()
 
+@traced("api.calendar")
 def delete_event(event_id: int) -> dict:
-    r = requests.delete(f"{BASE}&id={event_id}", timeout=15)
+    r = client.delete(f"{BASE}&id={event_id}", endpoint="calendar.delete")
     r.raise_for_status()
     try:
         return r.json()
     except Exception:
-        return {"ok": True, "status_code": r.status_code}
\ No newline at end of file
+        return {"ok": True, "status_code": r.status_code}
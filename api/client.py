@@ -0,0 +1,146 @@
+import os
+import time
+import random
+import threading
+from collections import deque
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Point NIMBUS_API_ROOT at a local stub server to run without the real API.
+API_ROOT = os.environ.get("NIMBUS_API_ROOT", "https://api.responsible-nlp.net").rstrip("/")
+
+CONNECT_TIMEOUT = float(os.environ.get("NIMBUS_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.environ.get("NIMBUS_READ_TIMEOUT", "15"))
+MAX_RETRIES = int(os.environ.get("NIMBUS_MAX_RETRIES", "2"))
+BACKOFF_BASE = 0.2
+BACKOFF_MAX = 2.0
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+class EndpointStats:
+    def __init__(self, window: int = 256):
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.latencies = deque(maxlen=window)
+
+    def summary(self) -> dict:
+        lat = sorted(self.latencies)
+
+        def pct(p):
+            if not lat:
+                return None
+            return round(lat[min(len(lat) - 1, int(p * len(lat)))] * 1000, 1)
+
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "retries": self.retries,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "max_ms": round(lat[-1] * 1000, 1) if lat else None,
+        }
+
+
+class HTTPClient:
+    """Pooled keep-alive session with timeouts, bounded retries and latency stats.
+
+    Only idempotent requests are retried unless the caller says otherwise,
+    using full-jitter exponential backoff between attempts.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 8,
+        connect_timeout: float = CONNECT_TIMEOUT,
+        read_timeout: float = READ_TIMEOUT,
+        max_retries: int = MAX_RETRIES,
+        backoff_base: float = BACKOFF_BASE,
+        backoff_max: float = BACKOFF_MAX,
+    ):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _record(self, endpoint: str, elapsed: float | None = None, error: bool = False, retry: bool = False):
+        with self._lock:
+            st = self._stats.get(endpoint)
+            if st is None:
+                st = self._stats[endpoint] = EndpointStats()
+            st.count += 1
+            if elapsed is not None:
+                st.latencies.append(elapsed)
+            if error:
+                st.errors += 1
+            if retry:
+                st.retries += 1
+
+    def _backoff(self, attempt: int):
+        time.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt))))
+
+    def request(self, method: str, url: str, endpoint: str | None = None, idempotent: bool | None = None, **kwargs) -> requests.Response:
+        method = method.upper()
+        if endpoint is None:
+            endpoint = f"{method} {urlsplit(url).path}"
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        retries = self.max_retries if idempotent else 0
+        kwargs.setdefault("timeout", (self.connect_timeout, self.read_timeout))
+
+        for attempt in range(retries + 1):
+            last = attempt == retries
+            start = time.perf_counter()
+            try:
+                r = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self._record(endpoint, time.perf_counter() - start, error=True, retry=not last)
+                if last:
+                    raise
+                self._backoff(attempt)
+                continue
+
+            elapsed = time.perf_counter() - start
+            if r.status_code in RETRY_STATUSES and not last:
+                self._record(endpoint, elapsed, error=True, retry=True)
+                r.close()
+                self._backoff(attempt)
+                continue
+
+            self._record(endpoint, elapsed, error=r.status_code >= 400)
+            return r
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> requests.Response:
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> requests.Response:
+        return self.request("DELETE", url, **kwargs)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {name: st.summary() for name, st in self._stats.items()}
+
+    def close(self):
+        self.session.close()
+
+
+client = HTTPClient()
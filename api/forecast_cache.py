@@ -0,0 +1,266 @@
+import os
+import json
+import time
+import atexit
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+
+
+# Every lookup and prefetch normalises its place; the same few names recur.
+@lru_cache(maxsize=1024)
+def normalize_place(place: str) -> str:
+    return " ".join((place or "").split()).casefold()
+
+
+class ForecastCache:
+    """TTL + LRU cache in front of a forecast fetch function.
+
+    Concurrent lookups for the same place share one fetch (single-flight).
+    With a path, entries are persisted as JSON and reloaded on start-up;
+    expiry uses wall-clock time so it stays valid across restarts. Writes
+    are debounced onto a timer thread (save_delay) so lookups never wait
+    for the disk, and flushed once more at exit.
+    Speculative lookups (see Prefetcher) are kept out of hits/misses;
+    prefetch_hits counts foreground lookups that a prefetch answered.
+    """
+
+    def __init__(
+        self,
+        fetch,
+        ttl: float = 600.0,
+        max_entries: int = 64,
+        path: str | None = None,
+        save_delay: float = 1.0,
+    ):
+        self._fetch = fetch
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.path = path
+        self.save_delay = save_delay
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.prefetch_hits = 0
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._speculative = set()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._save_timer = None
+
+        if path:
+            self._load()
+            atexit.register(self.flush)
+
+    def _fresh(self, entry, max_age: float | None = None) -> bool:
+        ttl = self.ttl if max_age is None else min(self.ttl, max_age)
+        return entry is not None and time.time() - entry[0] < ttl
+
+    def peek(self, place: str, max_age: float | None = None, key: str | None = None) -> dict | None:
+        key = key or normalize_place(place)
+        # Entries are immutable tuples replaced whole under the lock, so a
+        # bare dict read is safe; this runs on every turn via the prefetcher.
+        entry = self._entries.get(key)
+        return entry[1] if self._fresh(entry, max_age) else None
+
+    def get(self, place: str, speculative: bool = False, max_age: float | None = None) -> dict:
+        key = normalize_place(place)
+        with self._lock:
+            entry = self._entries.get(key)
+            if self._fresh(entry, max_age):
+                if not speculative:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    if key in self._speculative:
+                        self._speculative.discard(key)
+                        self.prefetch_hits += 1
+                return entry[1]
+
+            # [future, started speculatively, joined by a foreground lookup]
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = [Future(), speculative, False]
+                if not speculative:
+                    self.misses += 1
+            elif not speculative:
+                self.coalesced += 1
+                if flight[1] and not flight[2]:
+                    flight[2] = True
+                    self.prefetch_hits += 1
+
+        fut = flight[0]
+        if not leader:
+            return fut.result()
+
+        try:
+            data = self._fetch(place)
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            fut.set_exception(e)
+            raise
+
+        self.put(place, data)
+        with self._lock:
+            self._inflight.pop(key, None)
+            if speculative and not flight[2]:
+                self._speculative.add(key)
+            else:
+                self._speculative.discard(key)
+        fut.set_result(data)
+        return data
+
+    def put(self, place: str, data: dict):
+        now = time.time()
+        keys = {normalize_place(place)}
+        # The API canonicalises names ("marburg" -> "Marburg"); cache both.
+        if isinstance(data, dict) and data.get("place"):
+            keys.add(normalize_place(data["place"]))
+
+        with self._lock:
+            for key in keys:
+                self._entries[key] = (now, data)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        self._schedule_save()
+
+    def invalidate(self, place: str | None = None):
+        with self._lock:
+            if place is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(normalize_place(place), None)
+        self._schedule_save()
+
+    def places(self) -> list[str]:
+        with self._lock:
+            return [entry[1].get("place", key) for key, entry in self._entries.items() if isinstance(entry[1], dict)]
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            return
+        for key, (ts, data) in sorted(raw.items(), key=lambda kv: kv[1][0]):
+            if self._fresh((ts, data)):
+                self._entries[key] = (ts, data)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _schedule_save(self):
+        if not self.path:
+            return
+        with self._lock:
+            if self._save_timer is not None:
+                return
+            timer = self._save_timer = threading.Timer(self.save_delay, self.flush)
+            timer.daemon = True
+        timer.start()
+
+    def flush(self):
+        """Write the cache to disk now."""
+        if not self.path:
+            return
+        # One writer at a time; each writes its own temp file, so a reader
+        # only ever sees a complete old or new file.
+        with self._save_lock:
+            with self._lock:
+                # Changes made after this snapshot schedule a new save.
+                self._save_timer = None
+                raw = {key: [ts, data] for key, (ts, data) in self._entries.items()}
+            folder = os.path.dirname(self.path) or "."
+            try:
+                os.makedirs(folder, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=folder, prefix=".forecast-", suffix=".tmp")
+                try:
+                    with os.fdopen(fd, "w", encoding="utf-8") as f:
+                        json.dump(raw, f)
+                    os.replace(tmp, self.path)
+                except BaseException:
+                    os.remove(tmp)
+                    raise
+            except OSError:
+                pass
+
+
+class Prefetcher:
+    """Warms a ForecastCache in the background for places likely to come up next.
+
+    At most max_workers fetches run at once and at most max_pending are
+    outstanding; further requests are dropped rather than queued behind slow
+    ones. Entries older than refresh_after are fetched again before they expire.
+    """
+
+    def __init__(self, cache: ForecastCache, max_workers: int = 2, max_pending: int = 8, refresh_after: float | None = None):
+        self.cache = cache
+        self.max_pending = max_pending
+        self.refresh_after = cache.ttl / 2 if refresh_after is None else refresh_after
+        self.issued = 0
+        self.skipped = 0
+        self.dropped = 0
+        self.failed = 0
+        self._pending = set()
+        self._warmed_at = 0.0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+
+    def prefetch(self, place: str | None) -> bool:
+        if not place:
+            return False
+        key = normalize_place(place)
+        if self.cache.peek(place, max_age=self.refresh_after, key=key) is not None:
+            self.skipped += 1
+            return False
+
+        with self._lock:
+            if key in self._pending:
+                self.skipped += 1
+                return False
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return False
+            self._pending.add(key)
+            self.issued += 1
+
+        self._pool.submit(self._run, place, key)
+        return True
+
+    def warm(self, places, every: float = 60.0):
+        """prefetch() every place, at most once per `every` seconds."""
+        now = time.monotonic()
+        if self._warmed_at and now - self._warmed_at < every:
+            return
+        self._warmed_at = now
+        # Places cut off by the pending cap are picked up by the next sweep.
+        for place in list(places):
+            self.prefetch(place)
+
+    def _run(self, place: str, key: str):
+        try:
+            self.cache.get(place, speculative=True, max_age=self.refresh_after)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    def stats(self) -> dict:
+        used = self.cache.prefetch_hits
+        return {
+            "issued": self.issued,
+            "used": used,
+            "hit_rate": round(used / self.issued, 3) if self.issued else 0.0,
+            "skipped": self.skipped,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
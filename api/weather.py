@@ -1,9 +1,12 @@
-import requests
+from api.client import API_ROOT, client
+from utils.tracing import traced
 
-WEATHER_URL = "https://api.responsible-nlp.net/weather.php"
+WEATHER_URL = f"{API_ROOT}/weather.php"
 
+@traced("api.weather")
 def get_forecast(place: str) -> dict:
-    r = requests.post(WEATHER_URL, data={"place": place}, timeout=15)
+    # POST here is a read-only lookup, so it is safe to retry.
+    r = client.post(WEATHER_URL, data={"place": place}, endpoint="weather.forecast", idempotent=True)
     r.raise_for_status()
     return r.json()
 
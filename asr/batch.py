@@ -0,0 +1,145 @@
+import os
+import sys
+import json
+import time
+import argparse
+from dataclasses import asdict
+
+from utils.nimbus_state import MODEL_PATH
+
+
+def collect_inputs(source: str) -> list[tuple[str, str | None]]:
+    """Return (wav_path, reference_text) pairs from a directory, manifest or single WAV.
+
+    A manifest is either JSONL with "path" and optional "text" keys, or plain
+    text with one path per line and an optional tab-separated reference.
+    Relative paths in a manifest are resolved against the manifest's folder.
+    """
+    if os.path.isdir(source):
+        items = []
+        for root, _, files in os.walk(source):
+            for name in files:
+                if name.lower().endswith(".wav"):
+                    items.append((os.path.join(root, name), None))
+        return sorted(items)
+
+    if not os.path.exists(source):
+        raise FileNotFoundError(f"Input not found: {source}")
+    if source.lower().endswith(".wav"):
+        return [(source, None)]
+
+    base = os.path.dirname(os.path.abspath(source))
+    items = []
+    with open(source, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if source.endswith(".jsonl"):
+                row = json.loads(line)
+                path, ref = row["path"], row.get("text")
+            else:
+                path, _, ref = line.partition("\t")
+                ref = ref.strip() or None
+            if not os.path.isabs(path):
+                path = os.path.join(base, path)
+            items.append((path, ref))
+    return items
+
+
+def transcribe_segments(engine, paths, out, workers: int | None = None, respond: bool = False) -> tuple[int, int, float]:
+    """Long-form mode: one JSONL row per segment, each routed as its own turn.
+
+    Every segment gets its detected intent. With respond, segments are also
+    answered in order through the dialogue loop, one session per recording,
+    so "there" and "previously created" refer back within a recording.
+    """
+    from asr.wav import WavFile
+    from utils.intent import detect_intent
+
+    if respond:
+        from dialogue.loop import respond as reply_to
+        from utils.session import Session
+        from utils.tracing import tracer
+
+    done = failed = 0
+    audio_total = 0.0
+    for path in paths:
+        session = Session(id=os.path.basename(path)) if respond else None
+        try:
+            for seg in engine.transcribe_long(path, workers=workers):
+                row = {"path": path, **asdict(seg), "intent": detect_intent(seg.text)}
+                if respond:
+                    tracer.begin_turn(mode="file", audio=path, start=seg.start)
+                    try:
+                        row["reply"] = reply_to(seg.text, session)
+                    except Exception as e:
+                        row["error"] = str(e)
+                    tracer.end_turn()
+                out.write(json.dumps(row, ensure_ascii=False) + "\n")
+                out.flush()
+            with WavFile(path) as wav:
+                audio_total += wav.duration
+        except Exception as e:
+            out.write(json.dumps({"path": path, "error": str(e)}, ensure_ascii=False) + "\n")
+            failed += 1
+        done += 1
+    return done, failed, audio_total
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Transcribe a directory or manifest of WAV files to JSONL.")
+    ap.add_argument("source", help="a .wav file, a directory of them, or a .jsonl / .txt manifest")
+    ap.add_argument("-o", "--output", help="JSONL output file (default: stdout)")
+    ap.add_argument("-j", "--workers", type=int, default=None, help="worker threads (default: CPU count)")
+    ap.add_argument("--model", default=MODEL_PATH, help="Vosk model path")
+    ap.add_argument("--segments", action="store_true", help="split long recordings at pauses; one row per segment")
+    ap.add_argument("--respond", action="store_true", help="with --segments, answer each segment as a dialogue turn")
+    args = ap.parse_args(argv)
+
+    from asr.recognize_file import ASRFileEngine
+
+    items = collect_inputs(args.source)
+    if not items:
+        print("No WAV files found.", file=sys.stderr)
+        return 1
+
+    refs = {path: ref for path, ref in items}
+    engine = ASRFileEngine(model_path=args.model)
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    done = failed = 0
+    audio_total = 0.0
+    start = time.perf_counter()
+    try:
+        if args.segments:
+            done, failed, audio_total = transcribe_segments(
+                engine, refs.keys(), out, workers=args.workers, respond=args.respond
+            )
+        else:
+            for result in engine.transcribe_batch(refs.keys(), workers=args.workers):
+                ref = refs.get(result["path"])
+                if ref is not None:
+                    result["reference"] = ref
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                out.flush()
+
+                done += 1
+                if "error" in result:
+                    failed += 1
+                audio_total += result.get("audio_seconds", 0.0)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    wall = time.perf_counter() - start
+    rtf = wall / audio_total if audio_total else 0.0
+    print(
+        f"{done} files ({failed} failed), {audio_total:.1f}s audio in {wall:.1f}s, RTF {rtf:.3f}",
+        file=sys.stderr,
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
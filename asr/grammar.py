@@ -0,0 +1,49 @@
+import re
+
+from utils.intent import CALENDAR_KEYWORDS, WEATHER_KEYWORDS, WEATHER_CONTEXT_WORDS
+from utils.nimbus_state import STOP_WORDS
+
+# Words from the supported commands that are not intent keywords themselves.
+COMMAND_WORDS = [
+    "what", "will", "the", "be", "like", "in", "on", "for", "it", "is", "my",
+    "next", "days", "day", "an", "a", "titled", "called", "named", "at", "am", "pm",
+    "where", "when", "to", "place", "location", "room", "previously", "previous",
+    "created", "last", "that", "there", "temperature", "clouds", "clear", "sky",
+]
+
+NUMBER_WORDS = [
+    "one", "two", "three", "four", "five", "six", "seven",
+    "eight", "nine", "ten", "eleven", "twelve",
+]
+
+_WORD_RE = re.compile(r"[a-zäöüß']+")
+
+
+def _words(phrases) -> set[str]:
+    out = set()
+    for p in phrases:
+        out.update(_WORD_RE.findall((p or "").lower()))
+    return out
+
+
+class GrammarBuilder:
+    """Builds the recognizer word list from intents, places and calendar titles.
+
+    build() returns None when its inputs are unchanged since the last call,
+    so callers can skip SetGrammar entirely on most turns.
+    """
+
+    def __init__(self):
+        self._static = _words(
+            CALENDAR_KEYWORDS + WEATHER_KEYWORDS + WEATHER_CONTEXT_WORDS + COMMAND_WORDS + NUMBER_WORDS + STOP_WORDS
+        )
+        self._signature = None
+
+    def build(self, places=(), titles=()) -> list[str] | None:
+        signature = (frozenset(places), frozenset(titles))
+        if signature == self._signature:
+            return None
+        self._signature = signature
+
+        words = self._static | _words(signature[0]) | _words(signature[1])
+        return sorted(words) + ["[unk]"]
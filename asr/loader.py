@@ -0,0 +1,43 @@
+import threading
+from concurrent.futures import Future
+
+
+class EngineLoader:
+    """Loads the Vosk model and both ASR engines on a background thread.
+
+    The file engine is built first; the live engine reuses the same model, so
+    it is ready right after. file_engine() and live_engine() block only when
+    a mode that needs them is chosen before loading has finished.
+    """
+
+    def __init__(self, model_path: str):
+        self.model_path = model_path
+        self.file_ready = Future()
+        self.live_ready = Future()
+        self._thread = threading.Thread(target=self._run, name="asr-loader", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            from asr.recognize_file import ASRFileEngine
+            self.file_ready.set_result(ASRFileEngine(model_path=self.model_path))
+        except Exception as e:
+            self.file_ready.set_exception(e)
+
+        try:
+            from asr.recognize import ASREngine
+            self.live_ready.set_result(ASREngine(model_path=self.model_path))
+        except Exception as e:
+            self.live_ready.set_exception(e)
+
+    @staticmethod
+    def _wait(future: Future):
+        if not future.done():
+            print(" Loading the speech model...", flush=True)
+        return future.result()
+
+    def file_engine(self):
+        return self._wait(self.file_ready)
+
+    def live_engine(self):
+        return self._wait(self.live_ready)
@@ -0,0 +1,87 @@
+import os
+os.environ["KALDI_LOG_LEVEL"] = "0"
+
+import threading
+import weakref
+
+from contextlib import contextmanager
+
+@contextmanager
+def suppress_stderr():
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    old_fd = os.dup(2)
+    try:
+        os.dup2(devnull, 2)
+        yield
+    finally:
+        os.dup2(old_fd, 2)
+        os.close(old_fd)
+        os.close(devnull)
+
+
+# One Model per path for the whole process. Entries are weak so a model is
+# freed as soon as the last engine holding it goes away.
+_models: "weakref.WeakValueDictionary[str, Model]" = weakref.WeakValueDictionary()
+_lock = threading.Lock()
+
+
+_vosk = None
+
+
+def vosk():
+    """Import vosk on first use; importing it loads the native Kaldi library."""
+    global _vosk
+    if _vosk is None:
+        import vosk as module
+        module.SetLogLevel(0)
+        _vosk = module
+    return _vosk
+
+
+def accept_waveform(rec, data) -> bool:
+    """rec.AcceptWaveform for any buffer (a slice of a mapped file, a NumPy
+    array's memory) without first copying it into a bytes object."""
+    v = vosk()
+    ffi = getattr(v, "_ffi", None)
+    lib = getattr(v, "_c", None)
+    handle = getattr(rec, "_handle", None)
+    # These are vosk internals; any build without them takes the copying path.
+    if ffi is None or lib is None or handle is None or isinstance(data, bytes):
+        return rec.AcceptWaveform(bytes(data))
+    data = memoryview(data)
+    res = lib.vosk_recognizer_accept_waveform(handle, ffi.from_buffer(data), data.nbytes)
+    if res < 0:
+        raise Exception("Failed to process waveform")
+    return res != 0
+
+
+def _key(model_path: str) -> str:
+    return os.path.realpath(model_path)
+
+
+def get_model(model_path: str) -> "Model":
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Vosk model path not found: {model_path}")
+
+    key = _key(model_path)
+    # Held while loading so a second caller waits for the first load instead
+    # of starting its own.
+    with _lock:
+        model = _models.get(key)
+        if model is None:
+            Model = vosk().Model
+            with suppress_stderr():
+                model = Model(model_path)
+            _models[key] = model
+        return model
+
+
+def unload_model(model_path: str) -> bool:
+    """Drop the registry entry; engines still holding the model keep it alive."""
+    with _lock:
+        return _models.pop(_key(model_path), None) is not None
+
+
+def loaded_models() -> list[str]:
+    with _lock:
+        return list(_models.keys())
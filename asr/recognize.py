@@ -1,99 +1,202 @@
-import os
-import sys
-os.environ["KALDI_LOG_LEVEL"] = "0"
-
 import json
 import time
 import queue
 import threading
-import audioop
-
-import sounddevice as sd
-from vosk import Model, KaldiRecognizer, SetLogLevel
-SetLogLevel(0)
-
-from contextlib import contextmanager
-
-@contextmanager
-def suppress_stderr():
-    devnull = os.open(os.devnull, os.O_WRONLY)
-    old_fd = os.dup(2)
-    try:
-        os.dup2(devnull, 2)
-        yield
-    finally:
-        os.dup2(old_fd, 2)
-        os.close(old_fd)
-        os.close(devnull)
-
-GRAMMAR = [
-    "weather", "forecast", "temperature",
-    "today", "tomorrow",
-    "monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday",
-    "marburg", "frankfurt",
-    "rain", "snow", "clouds", "clear", "mist", "thunderstorm",
-    "there",
-    "next", "days", "one", "two", "three", "four", "five", "six", "seven",
-    "calendar", "appointment", "meeting", "where", "when"
-]
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Iterator
 
+from asr.grammar import GrammarBuilder
+from asr.models import get_model, vosk
+from asr.vad import EnergyVAD
+from utils.nimbus_state import STOP_WORDS, known_places, known_titles
+from utils.tracing import span
 
 ENERGY_THRESHOLD = 300
-SILENCE_SECONDS = 1.0
+SILENCE_SECONDS = 0.7
+PREROLL_SECONDS = 0.3
 MIN_WORDS = 2
 MIN_AVG_CONF = 0.60
 
 
+@dataclass(frozen=True)
+class PartialResult:
+    text: str
+    final: bool = False
+
+
+@dataclass(frozen=True)
+class _Endpoint:
+    # Queued after the last chunk of an utterance in continuous listening.
+    voiced_seconds: float
+
+
 class ASREngine:
 
-    def __init__(self, model_path: str, sample_rate: int = 16000, device: int | None = None):
-        if not os.path.exists(model_path):
-            raise FileNotFoundError(f"Vosk model path not found: {model_path}")
+    def __init__(self, model_path: str, sample_rate: int = 16000, device: int | None = None, vad=None):
+        # Imported here rather than at module level so that loading this module
+        # stays cheap; a missing PortAudio still fails engine creation, as before.
+        import sounddevice as sd
 
         if device is not None:
             sd.default.device = (device, None)
 
-        with suppress_stderr():
-            self.model = Model(model_path)
+        self.model = get_model(model_path)
         self.sample_rate = sample_rate
 
-        grammar_json = json.dumps(GRAMMAR)
-        self.rec = KaldiRecognizer(self.model, self.sample_rate, grammar_json)
+        self.grammar = GrammarBuilder()
+        grammar_json = json.dumps(self.grammar.build(known_places, known_titles))
+        self.rec = vosk().KaldiRecognizer(self.model, self.sample_rate, grammar_json)
 
         self.q = queue.Queue()
 
+        self.vad = vad or EnergyVAD(sample_rate=self.sample_rate, min_energy=ENERGY_THRESHOLD)
+        self.blocksize = self.vad.frame_samples
+        # Audio from just before the VAD fires, so word onsets are not clipped.
+        self._preroll = deque(maxlen=max(1, int(PREROLL_SECONDS * self.sample_rate / self.blocksize)))
+
         self._last_voice_ts = 0.0
         self._first_voice_ts = 0.0
         self._voiced_seconds = 0.0
+        self._segments = []
+        self._words = []
+        self._hold = None
+
+    def refresh_grammar(self) -> bool:
+        words = self.grammar.build(known_places, known_titles)
+        if words is None:
+            return False
+        # Swaps the decoding graph on the existing recognizer; the model stays loaded.
+        self.rec.SetGrammar(json.dumps(words))
+        return True
 
     def _reset_session(self):
+        self.refresh_grammar()
         self.rec.Reset()
         self.q = queue.Queue()
+        self.vad.reset()
+        self._preroll.clear()
         self._last_voice_ts = time.time()
         self._first_voice_ts = 0.0
         self._voiced_seconds = 0.0
+        self._segments = []
+        self._words = []
+
+    def _commit(self, res: dict):
+        text = (res.get("text") or "").strip()
+        if text:
+            self._segments.append(text)
+        self._words.extend(res.get("result") or [])
+
+    def _decode_loop(
+        self,
+        on_partial: Callable[[PartialResult], None] | None,
+        on_utterance: Callable[[str], None] | None = None,
+        on_start: Callable[[], None] | None = None,
+    ):
+        # Runs on its own thread while audio is still arriving, so by the time
+        # the speaker stops only the last few chunks are left to decode.
+        last = ""
+        started = False
+        while True:
+            chunk = self.q.get()
+            if chunk is None:
+                break
+
+            if isinstance(chunk, _Endpoint):
+                self._commit(json.loads(self.rec.FinalResult()))
+                text = " ".join(self._segments)
+                if on_partial is not None and text:
+                    on_partial(PartialResult(text, final=True))
+                on_utterance(self._accepted(text, chunk.voiced_seconds))
+                # Ready for the next utterance on the same recognizer; calendar
+                # titles may have changed the vocabulary in the meantime.
+                self.rec.Reset()
+                self.refresh_grammar()
+                self._segments = []
+                self._words = []
+                last = ""
+                started = False
+                continue
+
+            if not started:
+                started = True
+                if on_start is not None:
+                    on_start()
+
+            if self.rec.AcceptWaveform(chunk):
+                self._commit(json.loads(self.rec.Result()))
+                hypothesis = " ".join(self._segments)
+            else:
+                partial = (json.loads(self.rec.PartialResult()).get("partial") or "").strip()
+                hypothesis = " ".join(self._segments + ([partial] if partial else []))
+
+            if on_partial is not None and hypothesis and hypothesis != last:
+                last = hypothesis
+                on_partial(PartialResult(hypothesis))
+
+    def _accepted(self, text: str, voiced_seconds: float) -> str:
+        # Empty when the utterance was too short, too unsure or too few words.
+        if voiced_seconds < 0.25:
+            return ""
+
+        words = self._words
+        if words:
+            avg_conf = sum(w.get("conf", 0.0) for w in words) / len(words)
+            if avg_conf < MIN_AVG_CONF:
+                return ""
+
+        # A lone stop word still has to get through to end the conversation.
+        if len(text.split()) < MIN_WORDS and text not in STOP_WORDS:
+            return ""
+
+        return text
 
     def _callback(self, indata, frames, _time, status):
         if status:
             pass
 
-        energy = audioop.rms(indata, 2)
+        frame = bytes(indata)
         now = time.time()
 
-        if energy >= ENERGY_THRESHOLD:
+        if self.vad.is_speech(frame):
             if self._first_voice_ts == 0.0:
                 self._first_voice_ts = now
             self._last_voice_ts = now
             self._voiced_seconds += frames / float(self.sample_rate)
-            self.q.put(bytes(indata))
+            while self._preroll:
+                self.q.put(self._preroll.popleft())
+            self.q.put(frame)
         else:
-            pass
+            self._preroll.append(frame)
 
-    def listen_push_to_talk(self) -> str:
+    def _continuous_callback(self, indata, frames, _time, status):
+        if self._hold is not None and self._hold():
+            # Our own reply coming back through the microphone is not an utterance.
+            self._preroll.clear()
+        else:
+            self._callback(indata, frames, _time, status)
+
+        if self._first_voice_ts != 0.0 and time.time() - self._last_voice_ts >= SILENCE_SECONDS:
+            self.q.put(_Endpoint(self._voiced_seconds))
+            self._first_voice_ts = 0.0
+            self._voiced_seconds = 0.0
+            self.vad.reset()
+
+    def listen_push_to_talk(
+        self,
+        on_partial: Callable[[PartialResult], None] | None = None,
+        on_start: Callable[[], None] | None = None,
+    ) -> str:
         input("Press ENTER to start speaking...")
+        if on_start is not None:
+            on_start()
 
         self._reset_session()
 
+        decoder = threading.Thread(target=self._decode_loop, args=(on_partial,), daemon=True)
+        decoder.start()
+
         stop_event = threading.Event()
 
         def _wait_for_stop():
@@ -103,9 +206,11 @@ class ASREngine:
         stopper = threading.Thread(target=_wait_for_stop, daemon=True)
         stopper.start()
 
+        import sounddevice as sd
+
         stream = sd.RawInputStream(
             samplerate=self.sample_rate,
-            blocksize=8000,
+            blocksize=self.blocksize,
             dtype="int16",
             channels=1,
             callback=self._callback
@@ -113,36 +218,77 @@ class ASREngine:
 
         stream.start()
         try:
-            while True:
-                time.sleep(0.03)
-
-                if stop_event.is_set():
-                    break
+            with span("asr.capture"):
+                while True:
+                    time.sleep(0.03)
 
-                if self._first_voice_ts != 0.0:
-                    if time.time() - self._last_voice_ts >= SILENCE_SECONDS:
+                    if stop_event.is_set():
                         break
+
+                    if self._first_voice_ts != 0.0:
+                        if time.time() - self._last_voice_ts >= SILENCE_SECONDS:
+                            break
         finally:
             stream.stop()
             stream.close()
+            self.q.put(None)
+            # Only the decode backlog left after capture ends adds to turn latency.
+            with span("asr.decode"):
+                decoder.join()
+                self._commit(json.loads(self.rec.FinalResult()))
+
+        text = " ".join(self._segments)
+        if on_partial is not None and text:
+            on_partial(PartialResult(text, final=True))
+
+        return self._accepted(text, self._voiced_seconds)
+
+    def listen_continuous(
+        self,
+        on_partial: Callable[[PartialResult], None] | None = None,
+        on_start: Callable[[], None] | None = None,
+        hold: Callable[[], bool] | None = None,
+        stop: threading.Event | None = None,
+    ) -> Iterator[str]:
+        """Yield utterances one by one from a single, always-open input stream.
+
+        The stream, recognizer and decoder thread stay up between utterances,
+        so nothing is reopened per turn and the first syllable is never lost
+        to stream start-up. An utterance ends after SILENCE_SECONDS without
+        speech; ones that fail the usual checks are skipped. While hold()
+        is true (e.g. a reply is playing) audio is ignored. Runs until the
+        generator is closed or stop is set.
+        """
+        import sounddevice as sd
 
-        if self._voiced_seconds < 0.25:
-            return ""
-
-        while not self.q.empty():
-            self.rec.AcceptWaveform(self.q.get())
-
-        res = json.loads(self.rec.FinalResult())
-        text = (res.get("text") or "").strip()
-
-        words = res.get("result") or []
-        if words:
-            avg_conf = sum(w.get("conf", 0.0) for w in words) / len(words)
-            if avg_conf < MIN_AVG_CONF:
-                return ""
-
-        if len(text.split()) < MIN_WORDS:
-            return ""
+        self._reset_session()
+        self._hold = hold
+        utterances = queue.Queue()
+        decoder = threading.Thread(
+            target=self._decode_loop, args=(on_partial, utterances.put, on_start), daemon=True
+        )
+        decoder.start()
 
-        return text
+        stream = sd.RawInputStream(
+            samplerate=self.sample_rate,
+            blocksize=self.blocksize,
+            dtype="int16",
+            channels=1,
+            callback=self._continuous_callback
+        )
 
+        stream.start()
+        try:
+            while stop is None or not stop.is_set():
+                try:
+                    text = utterances.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if text:
+                    yield text
+        finally:
+            stream.stop()
+            stream.close()
+            self.q.put(None)
+            decoder.join()
+            self._hold = None
@@ -1,47 +1,112 @@
 import os
-import sys
-os.environ["KALDI_LOG_LEVEL"] = "0"
 import json
-import wave
-from vosk import Model, KaldiRecognizer, SetLogLevel
-SetLogLevel(0)
-from contextlib import contextmanager
-
-@contextmanager
-def suppress_stderr():
-    devnull = os.open(os.devnull, os.O_WRONLY)
-    old_fd = os.dup(2)
-    try:
-        os.dup2(devnull, 2)
-        yield
-    finally:
-        os.dup2(old_fd, 2)
-        os.close(old_fd)
-        os.close(devnull)
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterable, Iterator
+
+from asr.models import accept_waveform, get_model, vosk
+from asr.segment import Segment, find_segments
+from asr.wav import WavFile, pcm16_chunks
+from utils.tracing import traced
 
 class ASRFileEngine:
-    def __init__(self, model_path: str):
-        if not os.path.exists(model_path):
-            raise FileNotFoundError(f"Vosk model path not found: {model_path}")
-        with suppress_stderr():
-            self.model = Model(model_path)
+    def __init__(self, model_path: str, sample_rate: int = 16000):
+        self.model = get_model(model_path)
+        # Every file is converted to this rate, whatever it was recorded at.
+        self.sample_rate = sample_rate
+        self._local = threading.local()
 
-    def transcribe_wav(self, wav_path: str) -> str:
+    def _recognizer(self, sample_rate: int, words: bool = False):
+        # One recognizer per worker thread (and sample rate), all on the shared model.
+        recs = getattr(self._local, "recs", None)
+        if recs is None:
+            recs = self._local.recs = {}
+        rec = recs.get(sample_rate)
+        if rec is None:
+            rec = recs[sample_rate] = vosk().KaldiRecognizer(self.model, sample_rate)
+        else:
+            rec.Reset()
+        rec.SetWords(words)
+        return rec
+
+    @traced("asr.decode")
+    def _decode(self, wav_path: str) -> tuple[str, float]:
         if not os.path.exists(wav_path):
             raise FileNotFoundError(f"Audio file not found: {wav_path}")
 
-        wf = wave.open(wav_path, "rb")
-        if wf.getnchannels() != 1 or wf.getsampwidth() != 2:
-            raise ValueError("WAV must be mono, 16-bit PCM.")
-        sample_rate = wf.getframerate()
-
-        rec = KaldiRecognizer(self.model, sample_rate)
+        rec = self._recognizer(self.sample_rate)
+        with WavFile(wav_path) as wav:
+            audio_seconds = wav.duration
+            for chunk in pcm16_chunks(wav, self.sample_rate):
+                accept_waveform(rec, chunk)
+                chunk.release()
 
-        while True:
-            data = wf.readframes(4000)
-            if len(data) == 0:
-                break
-            rec.AcceptWaveform(data)
+        res = json.loads(rec.FinalResult())
+        return (res.get("text") or "").strip(), audio_seconds
 
+    def _decode_segment(self, wav: WavFile, start: int, stop: int) -> Segment:
+        rec = self._recognizer(self.sample_rate, words=True)
+        for chunk in pcm16_chunks(wav, self.sample_rate, start=start, stop=stop):
+            accept_waveform(rec, chunk)
+            chunk.release()
         res = json.loads(rec.FinalResult())
-        return (res.get("text") or "").strip()
+
+        # Word times are relative to the audio the recognizer saw.
+        offset = start / float(wav.sample_rate)
+        words = [
+            dict(w, start=round(w["start"] + offset, 3), end=round(w["end"] + offset, 3))
+            for w in res.get("result") or []
+        ]
+        confs = [w["conf"] for w in words if "conf" in w]
+        return Segment(
+            start=round(offset, 3),
+            end=round(stop / float(wav.sample_rate), 3),
+            text=(res.get("text") or "").strip(),
+            confidence=round(sum(confs) / len(confs), 3) if confs else None,
+            words=words,
+        )
+
+    def transcribe_long(self, wav_path: str, workers: int | None = None) -> Iterator[Segment]:
+        """Split a recording at pauses and decode the pieces in parallel.
+
+        Segments are yielded in order as soon as each one and everything
+        before it is decoded; segments without recognized words are skipped.
+        """
+        if not os.path.exists(wav_path):
+            raise FileNotFoundError(f"Audio file not found: {wav_path}")
+
+        with WavFile(wav_path) as wav:
+            ranges = find_segments(wav)
+            pool = ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+            try:
+                for seg in pool.map(lambda r: self._decode_segment(wav, *r), ranges):
+                    if seg.text:
+                        yield seg
+            finally:
+                # If the caller stops early, segments not yet started are dropped.
+                pool.shutdown(cancel_futures=True)
+
+    def transcribe_wav(self, wav_path: str) -> str:
+        text, _ = self._decode(wav_path)
+        return text
+
+    def _transcribe_timed(self, wav_path: str) -> dict:
+        result = {"path": wav_path}
+        start = time.perf_counter()
+        try:
+            text, audio_seconds = self._decode(wav_path)
+            result["text"] = text
+            result["audio_seconds"] = round(audio_seconds, 3)
+        except Exception as e:
+            result["error"] = str(e)
+        result["elapsed"] = round(time.perf_counter() - start, 3)
+        return result
+
+    def transcribe_batch(self, wav_paths: Iterable[str], workers: int | None = None) -> Iterator[dict]:
+        """Transcribe many files on a thread pool, yielding results as they finish."""
+        workers = workers or os.cpu_count() or 1
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(self._transcribe_timed, p) for p in wav_paths]
+            for fut in as_completed(futures):
+                yield fut.result()
@@ -0,0 +1,97 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from asr.wav import WavFile
+
+FRAME_MS = 30
+MIN_ENERGY = 300.0
+SPEECH_RATIO = 3.0
+# Pauses at least this long split a recording; shorter ones stay inside a segment.
+MIN_SILENCE_SECONDS = 0.5
+# Silence kept on each side of a segment so word edges are not cut.
+PAD_SECONDS = 0.2
+# Longer stretches without a pause are split at their quietest frame.
+MAX_SEGMENT_SECONDS = 30.0
+
+
+@dataclass(frozen=True)
+class Segment:
+    start: float
+    end: float
+    text: str
+    confidence: float | None = None
+    words: list[dict] = field(default_factory=list)
+
+
+def frame_rms(wav: WavFile, frame_ms: int = FRAME_MS) -> np.ndarray:
+    """RMS energy of each whole frame of the file, computed block by block."""
+    hop = max(1, wav.sample_rate * frame_ms // 1000)
+    block = hop * 2000
+    out = []
+    for start in range(0, wav.frames, block):
+        x = wav.mono(start, min(start + block, wav.frames))
+        n = len(x) // hop
+        if n:
+            x = x[:n * hop].reshape(n, hop)
+            out.append(np.sqrt(np.einsum("ij,ij->i", x, x) / hop))
+    return np.concatenate(out) if out else np.zeros(0, dtype=np.float32)
+
+
+def find_segments(
+    wav: WavFile,
+    frame_ms: int = FRAME_MS,
+    min_silence: float = MIN_SILENCE_SECONDS,
+    pad: float = PAD_SECONDS,
+    max_seconds: float = MAX_SEGMENT_SECONDS,
+) -> list[tuple[int, int]]:
+    """(start, stop) frame ranges of the file's speech, split at pauses.
+
+    Speech is any frame whose energy clears both MIN_ENERGY and SPEECH_RATIO
+    times the file's noise floor (its 10th-percentile frame energy). Leading
+    and trailing silence and pauses of at least min_silence are left out.
+    """
+    rms = frame_rms(wav, frame_ms)
+    if not len(rms):
+        return []
+    threshold = max(MIN_ENERGY, float(np.percentile(rms, 10)) * SPEECH_RATIO)
+    speech = rms >= threshold
+    if not speech.any():
+        return []
+
+    # Runs of silent frames as [start, end) pairs.
+    edges = np.diff(np.concatenate(([1], speech.astype(np.int8), [1])))
+    quiet = zip(np.flatnonzero(edges == -1), np.flatnonzero(edges == 1))
+    min_run = max(1, int(round(min_silence * 1000 / frame_ms)))
+    gaps = [(s, e) for s, e in quiet if e - s >= min_run or s == 0 or e == len(speech)]
+
+    bounds, pos = [], 0
+    for s, e in gaps:
+        if s > pos:
+            bounds.append((pos, s))
+        pos = e
+    if pos < len(speech):
+        bounds.append((pos, len(speech)))
+
+    # Long stretches are cut at their quietest frame, at least halfway to the limit.
+    max_frames = max(2, int(max_seconds * 1000 / frame_ms))
+    split = []
+    for s, e in bounds:
+        while e - s > max_frames:
+            lo = s + max_frames // 2
+            cut = lo + int(np.argmin(rms[lo:s + max_frames]))
+            split.append((s, cut))
+            s = cut
+        split.append((s, e))
+
+    hop = max(1, wav.sample_rate * frame_ms // 1000)
+    pad_frames = int(pad * 1000 / frame_ms)
+    ranges = []
+    for i, (s, e) in enumerate(split):
+        # Padding never reaches past the middle of the pause to a neighbour.
+        before = min(pad_frames, (s - split[i - 1][1]) // 2) if i else pad_frames
+        after = min(pad_frames, (split[i + 1][0] - e) // 2) if i + 1 < len(split) else pad_frames
+        start = max(0, s - before) * hop
+        stop = wav.frames if i + 1 == len(split) and e == len(speech) else min(wav.frames, (e + after) * hop)
+        ranges.append((int(start), int(stop)))
+    return ranges
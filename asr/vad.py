@@ -0,0 +1,74 @@
+from collections import deque
+
+import numpy as np
+
+
+class EnergyVAD:
+    """Frame-level voice activity detector.
+
+    A frame counts as speech when its RMS energy clears an adaptive noise
+    floor, or when it is only moderately loud but crosses zero often (soft
+    fricatives such as "s" and "f"). A short hangover keeps word endings.
+    The floor follows quiet frames, and is also raised to the quietest frame
+    of the last floor_window_ms, so steady hiss that passes as voiced cannot
+    keep it pinned low; real speech always has a quieter gap in that window.
+
+    Any object with ``frame_samples``, ``is_speech(frame)`` and ``reset()``
+    can be passed to ASREngine in its place.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_ms: int = 30,
+        min_energy: float = 300.0,
+        speech_ratio: float = 3.0,
+        fricative_ratio: float = 1.5,
+        fricative_zcr: float = 0.25,
+        hangover_ms: int = 200,
+        floor_alpha: float = 0.05,
+        floor_window_ms: int = 2000,
+    ):
+        self.sample_rate = sample_rate
+        self.frame_samples = int(sample_rate * frame_ms / 1000)
+        self.min_energy = min_energy
+        self.speech_ratio = speech_ratio
+        self.fricative_ratio = fricative_ratio
+        self.fricative_zcr = fricative_zcr
+        self.hangover_frames = max(0, hangover_ms // frame_ms)
+        self.floor_alpha = floor_alpha
+
+        self.noise_floor = min_energy / speech_ratio
+        self._hang = 0
+        self._recent = deque(maxlen=max(1, floor_window_ms // frame_ms))
+
+    def reset(self):
+        # The learned noise floor is kept across utterances on purpose.
+        self._hang = 0
+
+    def is_speech(self, frame: bytes) -> bool:
+        samples = np.frombuffer(frame, dtype=np.int16).astype(np.float32)
+        if samples.size == 0:
+            return False
+
+        rms = float(np.sqrt(np.mean(samples * samples)))
+        zcr = np.count_nonzero(np.diff(np.signbit(samples))) / samples.size
+        self._recent.append(rms)
+
+        threshold = max(self.min_energy, self.noise_floor * self.speech_ratio)
+        voiced = rms >= threshold or (
+            rms >= self.noise_floor * self.fricative_ratio and zcr >= self.fricative_zcr
+        )
+
+        if voiced:
+            if len(self._recent) == self._recent.maxlen:
+                self.noise_floor = max(self.noise_floor, min(self._recent))
+            self._hang = self.hangover_frames
+            return True
+
+        self.noise_floor += self.floor_alpha * (rms - self.noise_floor)
+
+        if self._hang > 0:
+            self._hang -= 1
+            return True
+        return False
@@ -0,0 +1,240 @@
+import math
+import mmap
+import struct
+from typing import Iterator
+
+import numpy as np
+
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_IEEE_FLOAT = 3
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# Full scale of each sample type, expressed in 16-bit units.
+_SCALE = {
+    (WAVE_FORMAT_PCM, 8): 256.0,
+    (WAVE_FORMAT_PCM, 16): 1.0,
+    (WAVE_FORMAT_PCM, 24): 1.0 / 256,
+    (WAVE_FORMAT_PCM, 32): 1.0 / 65536,
+    (WAVE_FORMAT_IEEE_FLOAT, 32): 32768.0,
+    (WAVE_FORMAT_IEEE_FLOAT, 64): 32768.0,
+}
+
+_DTYPES = {
+    (WAVE_FORMAT_PCM, 8): np.uint8,
+    (WAVE_FORMAT_PCM, 16): np.dtype("<i2"),
+    (WAVE_FORMAT_PCM, 32): np.dtype("<i4"),
+    (WAVE_FORMAT_IEEE_FLOAT, 32): np.dtype("<f4"),
+    (WAVE_FORMAT_IEEE_FLOAT, 64): np.dtype("<f8"),
+}
+
+
+class WavFile:
+    """A WAV file mapped into memory; ``data`` is a memoryview of its sample bytes.
+
+    Accepts integer PCM (8/16/24/32-bit) and float PCM with any number of
+    channels, including WAVE_FORMAT_EXTENSIBLE headers. Nothing is read up
+    front beyond the chunk headers.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            try:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ValueError(f"Not a WAV file (empty): {path}")
+        try:
+            self._parse()
+        except Exception:
+            self._mm.close()
+            raise
+
+    def _parse(self):
+        mm = self._mm
+        if len(mm) < 12 or mm[0:4] != b"RIFF" or mm[8:12] != b"WAVE":
+            raise ValueError(f"Not a WAV file: {self.path}")
+
+        fmt = None
+        pos = 12
+        while pos + 8 <= len(mm):
+            chunk_id = mm[pos:pos + 4]
+            size = struct.unpack_from("<I", mm, pos + 4)[0]
+            body = pos + 8
+            if chunk_id == b"fmt ":
+                fmt = struct.unpack_from("<HHIIHH", mm, body)
+                tag = fmt[0]
+                if tag == WAVE_FORMAT_EXTENSIBLE and size >= 26:
+                    # The real format is the first two bytes of the sub-format GUID.
+                    tag = struct.unpack_from("<H", mm, body + 24)[0]
+                self.format = tag
+                self.channels = fmt[1]
+                self.sample_rate = fmt[2]
+                self.block_align = fmt[4]
+                self.bits = fmt[5]
+                # Checked here, before the data chunk divides by block_align.
+                width = self.bits // 8
+                if self.channels < 1 or width < 1 or self.bits % 8 or self.block_align != self.channels * width:
+                    raise ValueError(
+                        f"Unsupported WAV format ({self.channels} channels, {self.bits}-bit, "
+                        f"block align {self.block_align}): {self.path}"
+                    )
+            elif chunk_id == b"data":
+                if fmt is None:
+                    raise ValueError(f"WAV data before its format chunk: {self.path}")
+                # Recorders that were killed mid-write leave a size that runs
+                # past the end of the file (or 0xFFFFFFFF); use what is there.
+                end = min(body + size, len(mm))
+                end -= (end - body) % self.block_align
+                self.data = memoryview(mm)[body:end]
+                break
+            pos = body + size + (size & 1)
+        else:
+            raise ValueError(f"WAV file has no data chunk: {self.path}")
+
+        if (self.format, self.bits) not in _SCALE:
+            raise ValueError(f"Unsupported WAV encoding (format {self.format}, {self.bits}-bit): {self.path}")
+
+    @property
+    def frames(self) -> int:
+        return len(self.data) // self.block_align
+
+    @property
+    def duration(self) -> float:
+        return self.frames / float(self.sample_rate)
+
+    @property
+    def is_pcm16_mono(self) -> bool:
+        return self.format == WAVE_FORMAT_PCM and self.bits == 16 and self.channels == 1
+
+    def mono(self, start: int, stop: int) -> np.ndarray:
+        """Frames [start, stop) downmixed to one float32 channel on the 16-bit scale."""
+        raw = self.data[start * self.block_align:stop * self.block_align]
+        if self.bits == 24:
+            b = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+            # Little-endian 24-bit into the top of an int32, then shift back down to sign-extend.
+            samples = ((b[:, 0] << 8) | (b[:, 1] << 16) | (b[:, 2] << 24)) >> 8
+        else:
+            samples = np.frombuffer(raw, dtype=_DTYPES[(self.format, self.bits)])
+
+        x = samples.astype(np.float32)
+        if self.bits == 8:
+            x -= 128.0
+        x = x.reshape(-1, self.channels)
+        if self.channels == 1:
+            x = x[:, 0]
+        else:
+            # A matrix-vector product averages the channels far faster than mean(axis=1).
+            x = x @ np.full(self.channels, 1.0 / self.channels, dtype=np.float32)
+        return x * _SCALE[(self.format, self.bits)]
+
+    def close(self):
+        self.data.release()
+        try:
+            self._mm.close()
+        except BufferError:
+            # A chunk handed out by pcm16_chunks is still alive; the map is
+            # unmapped when the last of them is garbage collected.
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class StreamResampler:
+    """Resample a float32 stream chunk by chunk.
+
+    Downsampling first runs a windowed-sinc low-pass (cutoff just under the
+    new Nyquist frequency) so that, for example, the 8-22 kHz band of a
+    44.1 kHz recording does not fold into the speech band. Samples between
+    input points are linearly interpolated. State carries across chunks, so
+    the output is the same however the input is split.
+    """
+
+    def __init__(self, in_rate: int, out_rate: int, taps: int = 63):
+        g = math.gcd(in_rate, out_rate)
+        # Positions are kept as integers in units of 1/out_rate input samples,
+        # so rounding never drifts over a long recording.
+        self.up, self.down = out_rate // g, in_rate // g
+        if in_rate > out_rate:
+            cutoff = 0.45 * out_rate / in_rate  # cycles per input sample
+            n = np.arange(taps) - (taps - 1) // 2
+            h = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hanning(taps)
+            self._h = (h / h.sum()).astype(np.float32)
+        else:
+            self._h = np.ones(1, dtype=np.float32)
+        self._hist = np.zeros(len(self._h) - 1, dtype=np.float32)
+        # Skip the filter's group delay so output stays aligned with the input.
+        self._pos = (len(self._h) - 1) // 2 * self.up
+        self._buf = np.zeros(0, dtype=np.float32)
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        if len(self._h) > 1:
+            padded = np.concatenate((self._hist, x))
+            self._hist = padded[len(padded) - len(self._hist):]
+            x = np.convolve(padded, self._h, mode="valid").astype(np.float32)
+        buf = np.concatenate((self._buf, x)) if len(self._buf) else x
+
+        last = len(buf) - 1
+        if last * self.up < self._pos:
+            self._buf = buf
+            return np.zeros(0, dtype=np.float32)
+        n = (last * self.up - self._pos) // self.down + 1
+        t = self._pos + self.down * np.arange(n, dtype=np.int64)
+        i = t // self.up
+        frac = (t % self.up).astype(np.float32) / self.up
+        out = buf[i] * (1 - frac) + buf[np.minimum(i + 1, last)] * frac
+
+        self._pos += n * self.down
+        # The next position may lie past the end of this chunk.
+        drop = min(self._pos // self.up, len(buf))
+        self._buf = buf[drop:]
+        self._pos -= drop * self.up
+        return out
+
+    def flush(self) -> np.ndarray:
+        """Push out the samples still held back by the filter delay."""
+        pad = (len(self._h) - 1) // 2
+        return self.process(np.zeros(pad + 1, dtype=np.float32)) if pad else np.zeros(0, dtype=np.float32)
+
+
+def _to_pcm16(x: np.ndarray) -> memoryview:
+    pcm = np.clip(np.rint(x), -32768, 32767).astype("<i2")
+    return memoryview(pcm).cast("B")
+
+
+def pcm16_chunks(
+    wav: WavFile,
+    sample_rate: int | None = None,
+    chunk_frames: int = 4000,
+    start: int = 0,
+    stop: int | None = None,
+) -> Iterator[memoryview]:
+    """Mono 16-bit PCM at sample_rate (default: the file's own), in chunks.
+
+    start and stop select a range of the file's frames. A file that is
+    already mono 16-bit at that rate is passed through as slices of the
+    mapped file, so nothing is copied; anything else is converted one chunk
+    at a time, so memory use does not grow with length.
+    """
+    sample_rate = sample_rate or wav.sample_rate
+    stop = wav.frames if stop is None else min(stop, wav.frames)
+    if wav.is_pcm16_mono and sample_rate == wav.sample_rate:
+        step = chunk_frames * 2
+        for i in range(start * 2, stop * 2, step):
+            yield wav.data[i:min(i + step, stop * 2)]
+        return
+
+    resampler = StreamResampler(wav.sample_rate, sample_rate) if sample_rate != wav.sample_rate else None
+    for i in range(start, stop, chunk_frames):
+        x = wav.mono(i, min(i + chunk_frames, stop))
+        if resampler is not None:
+            x = resampler.process(x)
+        if len(x):
+            yield _to_pcm16(x)
+    if resampler is not None:
+        tail = resampler.flush()
+        if len(tail):
+            yield _to_pcm16(tail)
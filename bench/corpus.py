@@ -0,0 +1,118 @@
+import random
+
+CITIES = ["Marburg", "Frankfurt", "Hamburg", "Munich", "Berlin", "Cologne", "Stuttgart", "Leipzig"]
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+NUM_WORDS = ["one", "two", "three", "four", "five", "six", "seven"]
+HOUR_WORDS = ["one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten", "eleven", "twelve"]
+CONDITIONS = {"rain": "rain", "snow": "snow"}
+TITLES = ["party", "team meeting", "dentist", "lunch with Anna", "study group", "gym", "review"]
+ITEMS = ["appointment", "meeting", "event"]
+SMALL_TALK = [
+    "Hello",
+    "How are you",
+    "Tell me a joke",
+    "What is your name",
+    "Thanks a lot",
+    "Good morning Nimbus",
+    "Play some music",
+]
+
+# Label for a place resolved from "there"; the harness puts it in the session.
+LAST_PLACE = "LastPlace"
+
+# The demo commands from main.DEMO_AUDIO_FILES, labeled by hand.
+DEMO = [
+    ("What will the weather be like today in Marburg", "weather", {"place": "Marburg", "day": "today"}),
+    ("What will the weather be on Friday in Frankfurt", "weather", {"place": "Frankfurt", "day": "friday"}),
+    ("Will it rain there on Saturday", "weather", {"place": LAST_PLACE, "day": "saturday", "condition": "rain"}),
+    ("Will it snow there tomorrow", "weather", {"place": LAST_PLACE, "day": "tomorrow", "condition": "snow"}),
+    ("Next three days in Hamburg", "weather", {"place": "Hamburg", "next_n_days": 3}),
+    ("What will the weather be for the next three days in Munich", "weather", {"place": "Munich", "next_n_days": 3}),
+    ("Add an appointment titled party for tomorrow at ten pm", "calendar", {"action": "add", "title": "party", "time": [22, 0]}),
+    ("Where is my next appointment", "calendar", {"action": "next_query"}),
+    ("Change the place for my appointment tomorrow to Room twelve", "calendar", {"action": "update_place", "location": "Room twelve", "target_day": "tomorrow"}),
+    ("Delete the previously created appointment", "calendar", {"action": "delete_previous"}),
+    ("Add an appointment titled team meeting for Friday at nine am", "calendar", {"action": "add", "title": "team meeting", "time": [9, 0]}),
+    ("Delete appointment titled team meeting", "calendar", {"action": "delete_by_title", "title": "team meeting"}),
+]
+
+
+def _hour_24(word: str, ampm: str) -> int:
+    hour = HOUR_WORDS.index(word) + 1
+    return hour % 12 + (12 if ampm == "pm" else 0)
+
+
+def _weather(rng: random.Random) -> tuple[str, dict]:
+    city = rng.choice(CITIES)
+    weekday = rng.choice(WEEKDAYS)
+    kind = rng.randrange(7)
+
+    if kind == 0:
+        day = rng.choice(["today", "tomorrow"])
+        return f"What will the weather be like {day} in {city}", {"place": city, "day": day}
+    if kind == 1:
+        return f"What will the weather be on {weekday} in {city}", {"place": city, "day": weekday.lower()}
+    if kind == 2:
+        cond = rng.choice(list(CONDITIONS))
+        return f"Will it {cond} there on {weekday}", {"place": LAST_PLACE, "day": weekday.lower(), "condition": cond}
+    if kind == 3:
+        cond = rng.choice(list(CONDITIONS))
+        return f"Will it {cond} there tomorrow", {"place": LAST_PLACE, "day": "tomorrow", "condition": cond}
+    if kind == 4:
+        n = rng.randrange(1, 8)
+        return f"Next {NUM_WORDS[n - 1]} days in {city}", {"place": city, "next_n_days": n}
+    if kind == 5:
+        n = rng.randrange(1, 8)
+        return f"What will the weather be for the next {n} days in {city}", {"place": city, "next_n_days": n}
+    day = rng.choice(["today", "tomorrow"])
+    return f"weather {city} {day}", {"place": city, "day": day}
+
+
+def _calendar(rng: random.Random) -> tuple[str, dict]:
+    title = rng.choice(TITLES)
+    item = rng.choice(ITEMS)
+    kind = rng.randrange(7)
+
+    if kind in (0, 1):
+        day = rng.choice(["tomorrow", "today"])
+        word, ampm = rng.choice(HOUR_WORDS), rng.choice(["am", "pm"])
+        verb = "Add an appointment titled" if kind == 0 else "Schedule a meeting called"
+        spoken = ampm if rng.random() < 0.5 else " ".join(ampm)
+        text = f"{verb} {title} for {day} at {word} {spoken}"
+        return text, {"action": "add", "title": title, "time": [_hour_24(word, ampm), 0]}
+    if kind == 2:
+        return f"Where is my next {item}", {"action": "next_query"}
+    if kind == 3:
+        day = rng.choice(["tomorrow", "today"] + WEEKDAYS)
+        room = rng.randrange(1, 30)
+        text = f"Change the place for my appointment {day if day in ('tomorrow', 'today') else 'on ' + day} to Room {room}"
+        return text, {"action": "update_place", "location": f"Room {room}", "target_day": day.lower()}
+    if kind == 4:
+        return f"Delete the previously created {item}", {"action": "delete_previous"}
+    if kind == 5:
+        return f"Delete appointment titled {title}", {"action": "delete_by_title", "title": title}
+    return f"Remove {item} {title}", {"action": "delete_by_title", "title": title}
+
+
+def build_corpus(size: int = 5000, seed: int = 1187, asr_style: float = 0.3) -> list[dict]:
+    """Deterministic labeled utterances: {"text", "intent", "slots"}.
+
+    A share of them (asr_style) is lowercased the way Vosk transcripts are.
+    """
+    rng = random.Random(seed)
+    corpus = [{"text": text, "intent": intent, "slots": slots} for text, intent, slots in DEMO]
+    for _ in range(size):
+        r = rng.random()
+        if r < 0.45:
+            text, slots = _weather(rng)
+            intent = "weather"
+        elif r < 0.9:
+            text, slots = _calendar(rng)
+            intent = "calendar"
+        else:
+            text, slots = rng.choice(SMALL_TALK), {}
+            intent = "unknown"
+        if rng.random() < asr_style:
+            text = text.lower()
+        corpus.append({"text": text, "intent": intent, "slots": slots})
+    return corpus
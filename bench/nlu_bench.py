@@ -0,0 +1,231 @@
+import sys
+import json
+import time
+import argparse
+from collections import defaultdict
+
+from bench.corpus import LAST_PLACE, build_corpus
+
+BASELINE_PATH = "bench/baseline.json"
+
+
+def _stub_forecast(place: str) -> dict:
+    days = ["Today", "Tomorrow", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday", "Monday", "Tuesday"]
+    conds = ["clear sky", "light rain", "snow", "broken clouds", "mist", "thunderstorm", "moderate rain"]
+    return {
+        "place": place.title(),
+        "forecast": [
+            {"day": d, "weather": conds[i % len(conds)], "temperature": {"min": i, "max": i + 6}}
+            for i, d in enumerate(days)
+        ],
+    }
+
+
+class _StubCalendar:
+    def __init__(self):
+        self.events = {}
+        self.next_id = 1
+
+    def __call__(self, func_name: str, *args):
+        if func_name == "list":
+            return list(self.events.values())
+        if func_name == "create":
+            ev = dict(args[0], id=self.next_id)
+            self.events[self.next_id] = ev
+            self.next_id += 1
+            return ev
+        if func_name == "update":
+            eid, patch = args
+            self.events.get(eid, {}).update(patch)
+            return self.events.get(eid, {})
+        if func_name == "delete":
+            self.events.pop(args[0], None)
+            return {"ok": True}
+        raise AttributeError(func_name)
+
+
+def install_stubs():
+    """Swap the network-backed forecast cache and calendar store for in-memory stubs."""
+    from api.forecast_cache import ForecastCache, Prefetcher
+    from utils import calendar_handler, weather_handler
+    from utils.calendar_store import CalendarStore
+
+    weather_handler.forecast_cache = ForecastCache(_stub_forecast, ttl=float("inf"))
+    weather_handler.prefetcher = Prefetcher(weather_handler.forecast_cache)
+    calendar_handler.store = CalendarStore(_StubCalendar(), calendar_handler._event_start_dt, ttl=float("inf"))
+
+
+def _percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))]
+
+
+def _predict_slots(text: str, intent: str, session) -> dict:
+    from utils.nlu import parse
+    from utils.weather_handler import extract_place
+
+    frame = parse(text, intent=intent)
+    if intent == "weather":
+        return {
+            "place": extract_place(text, session),
+            "day": frame.slots["day"],
+            "next_n_days": frame.slots["next_n_days"],
+            "condition": frame.slots["condition"],
+        }
+    if intent == "calendar":
+        slots = dict(frame.slots, action=frame.action)
+        if slots.get("time") is not None:
+            slots["time"] = list(slots["time"])
+        return slots
+    return {}
+
+
+def _same(got, expected) -> bool:
+    # ASR output is lowercase, so string slots compare case-insensitively.
+    if isinstance(got, str) and isinstance(expected, str):
+        return got.lower() == expected.lower()
+    return got == expected
+
+
+def run(corpus: list[dict]) -> dict:
+    from utils.calendar_handler import handle_calendar
+    from utils.intent import detect_intent
+    from utils.session import Session
+    from utils.weather_handler import handle_weather
+
+    install_stubs()
+
+    intent_total = defaultdict(int)
+    intent_ok = defaultdict(int)
+    slot_total = defaultdict(int)
+    slot_ok = defaultdict(int)
+    nlu_lat = []
+    turn_lat = []
+    errors = []
+
+    session = Session()
+    start = time.perf_counter()
+    for row in corpus:
+        text, gold = row["text"], row["intent"]
+        session.last_place = LAST_PLACE
+        session.last_day = None
+
+        t0 = time.perf_counter()
+        intent = detect_intent(text)
+        predicted = _predict_slots(text, gold, session)
+        nlu_lat.append(time.perf_counter() - t0)
+
+        intent_total[gold] += 1
+        if intent == gold:
+            intent_ok[gold] += 1
+        elif len(errors) < 20:
+            errors.append({"text": text, "expected": gold, "got": intent})
+
+        for name, expected in row["slots"].items():
+            key = f"{gold}.{name}"
+            slot_total[key] += 1
+            if _same(predicted.get(name), expected):
+                slot_ok[key] += 1
+            elif len(errors) < 20:
+                errors.append({"text": text, "slot": key, "expected": expected, "got": predicted.get(name)})
+
+        t0 = time.perf_counter()
+        if intent == "weather":
+            handle_weather(text, session)
+        elif intent == "calendar":
+            handle_calendar(text, session)
+        turn_lat.append(time.perf_counter() - t0)
+    wall = time.perf_counter() - start
+
+    return {
+        "utterances": len(corpus),
+        "intent_accuracy": {k: round(intent_ok[k] / n, 4) for k, n in sorted(intent_total.items())},
+        "slot_accuracy": {k: round(slot_ok[k] / n, 4) for k, n in sorted(slot_total.items())},
+        "throughput_per_s": round(len(corpus) / wall, 1),
+        "nlu_p50_ms": round(_percentile(nlu_lat, 0.50) * 1000, 4),
+        "nlu_p99_ms": round(_percentile(nlu_lat, 0.99) * 1000, 4),
+        "handler_p50_ms": round(_percentile(turn_lat, 0.50) * 1000, 4),
+        "handler_p99_ms": round(_percentile(turn_lat, 0.99) * 1000, 4),
+        "errors": errors,
+    }
+
+
+def compare(report: dict, baseline: dict, accuracy_tolerance: float, speed_tolerance: float | None) -> list[str]:
+    problems = []
+    for section in ["intent_accuracy", "slot_accuracy"]:
+        for key, base in baseline.get(section, {}).items():
+            now = report[section].get(key, 0.0)
+            if now < base - accuracy_tolerance:
+                problems.append(f"{section}[{key}] dropped from {base:.4f} to {now:.4f}")
+
+    if speed_tolerance is not None and baseline.get("throughput_per_s"):
+        base = baseline["throughput_per_s"]
+        if report["throughput_per_s"] < base * (1 - speed_tolerance):
+            problems.append(f"throughput dropped from {base}/s to {report['throughput_per_s']}/s")
+        # p99 of sub-millisecond timings is too noisy to gate on; medians are not.
+        for key in ["nlu_p50_ms", "handler_p50_ms"]:
+            if baseline.get(key) and report[key] > baseline[key] * (1 + speed_tolerance):
+                problems.append(f"{key} rose from {baseline[key]} to {report[key]}")
+    return problems
+
+
+def print_report(report: dict):
+    print(f"{report['utterances']} utterances, {report['throughput_per_s']} utt/s")
+    print(f"  nlu      p50 {report['nlu_p50_ms']:.3f} ms   p99 {report['nlu_p99_ms']:.3f} ms")
+    print(f"  handler  p50 {report['handler_p50_ms']:.3f} ms   p99 {report['handler_p99_ms']:.3f} ms")
+    print("Intent accuracy:")
+    for k, v in report["intent_accuracy"].items():
+        print(f"  {k:<24} {v:.2%}")
+    print("Slot accuracy:")
+    for k, v in report["slot_accuracy"].items():
+        print(f"  {k:<24} {v:.2%}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="NLU accuracy and throughput benchmark with the network stubbed out.")
+    ap.add_argument("-n", "--size", type=int, default=5000, help="generated utterances (default: 5000)")
+    ap.add_argument("--seed", type=int, default=1187)
+    ap.add_argument("--baseline", default=BASELINE_PATH)
+    ap.add_argument("--save-baseline", action="store_true", help="write this run as the new baseline")
+    ap.add_argument("--accuracy-tolerance", type=float, default=0.0)
+    ap.add_argument("--speed-tolerance", type=float, default=0.3, help="allowed relative slowdown (default: 0.3)")
+    ap.add_argument("--no-speed", action="store_true", help="only gate on accuracy (e.g. on different hardware)")
+    ap.add_argument("--json", action="store_true", help="print the raw report as JSON")
+    args = ap.parse_args(argv)
+
+    report = run(build_corpus(args.size, args.seed))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+    if args.save_baseline:
+        saved = {k: v for k, v in report.items() if k != "errors"}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(saved, f, indent=2)
+            f.write("\n")
+        print(f"Baseline saved to {args.baseline}.")
+        return 0
+
+    try:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print("No baseline yet; run with --save-baseline to create one.")
+        return 0
+
+    problems = compare(report, baseline, args.accuracy_tolerance, None if args.no_speed else args.speed_tolerance)
+    if problems:
+        print("\nRegression against baseline:")
+        for p in problems:
+            print("  " + p)
+        return 1
+    print("\nNo regression against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Callable
+
+from utils.calendar_handler import handle_calendar
+from utils.intent import detect_intent
+from utils.nimbus_state import STOP_WORDS
+from utils.session import Session, default_session
+from utils.tracing import tracer
+from utils.weather_handler import handle_weather
+
+FALLBACK_REPLY = "Try: 'weather Frankfurt tomorrow' or 'Where is my next appointment?'"
+
+
+def respond(text: str, session: Session | None = None) -> str:
+    session = session or default_session
+    intent = detect_intent(text)
+    session.last_intent = intent
+    turn = tracer.current_turn()
+    if turn is not None:
+        turn.update(text=text, intent=intent)
+
+    if intent == "weather":
+        return handle_weather(text, session)
+    if intent == "calendar":
+        return handle_calendar(text, session)
+    return FALLBACK_REPLY
+
+
+async def respond_async(text: str, session: Session | None = None) -> str:
+    # The handlers block on HTTP and update the session, so each turn runs on
+    # a worker thread and turns are answered one at a time, in order.
+    return await asyncio.to_thread(respond, text, session)
+
+
+async def converse(
+    capture: Callable[[], str | None],
+    tts,
+    mode: str = "type",
+    empty_reply: str | None = None,
+) -> None:
+    """Run turns until capture() returns None or a stop word.
+
+    Capturing and answering are separate tasks: while one utterance is being
+    answered and spoken, the next one is already being captured. capture()
+    blocks (input(), push-to-talk ASR) and runs on a worker thread; the reply
+    is queued on the TTS worker, which does not block the loop either.
+    """
+    utterances: asyncio.Queue = asyncio.Queue()
+
+    async def listen():
+        while True:
+            # Speech capture is part of the turn; time spent typing is not.
+            turn = tracer.begin_turn(mode=mode) if mode == "speak" else None
+            try:
+                text = await asyncio.to_thread(capture)
+            except EOFError:
+                text = None
+            text = text.strip() if text is not None else None
+            if text is None or text.lower() in STOP_WORDS:
+                tracer.attach(None)
+                await utterances.put(None)
+                return
+            if turn is None:
+                turn = tracer.begin_turn(mode=mode)
+            await utterances.put((text, turn))
+
+    async def answer():
+        while True:
+            item = await utterances.get()
+            if item is None:
+                return
+            text, turn = item
+            tracer.attach(turn)
+            if text:
+                try:
+                    reply = await respond_async(text)
+                except Exception as e:
+                    reply = f"Sorry, something went wrong: {e}"
+            else:
+                reply = empty_reply
+            if reply:
+                print("Bot:", reply)
+                tts.say(reply)
+            tracer.end_turn()
+
+    await asyncio.gather(listen(), answer())
@@ -1,25 +1,14 @@
-import re
-
-DAYS = ["monday","tuesday","wednesday","thursday","friday","saturday","sunday"]
+from utils.nlu import day_of, intent_of, place_of, refers_back_of, scan
 
 def extract_day(text: str) -> str | None:
-    t = text.lower()
-    for d in DAYS:
-        if re.search(rf"\b{d}\b", t):
-            return d
-    return None
+    return day_of(scan(text))
 
 class DialogueManager:
     def __init__(self):
         self.context = {"last_place": None, "last_day": None}
 
     def route(self, text: str) -> str:
-        t = text.lower()
-        if any(w in t for w in ["weather", "forecast", "temperature", "rain", "snow", "cloud"]):
-            return "weather"
-        if any(w in t for w in ["calendar", "appointment", "meeting", "schedule", "add", "delete", "update", "change"]):
-            return "calendar"
-        return "unknown"
+        return intent_of(scan(text))
     
     def remember_day(self, day: str):
         if day:
@@ -27,24 +16,10 @@ class DialogueManager:
 
 
     def extract_place(self, text: str) -> str | None:
-        t = text.lower()
-
-        if re.search(r"\bthere\b", t):
+        s = scan(text)
+        if refers_back_of(s):
             return self.context.get("last_place")
-
-        m = re.search(r"\bin\s+([a-zA-ZÄÖÜäöüß\-]+)\b", text)
-        if m:
-            return m.group(1)
-
-        m = re.search(r"\bweather\s+([a-zA-ZÄÖÜäöüß\-]+)\b", text, flags=re.IGNORECASE)
-        if m:
-            return m.group(1)
-
-        caps = re.findall(r"\b[A-Z][a-zA-ZÄÖÜäöüß\-]{2,}\b", text)
-        if caps:
-            return caps[-1]
-
-        return None
+        return place_of(s)
 
     def remember_place(self, place: str):
         if place:
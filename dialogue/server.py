@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from api.client import client
+from dialogue.loop import respond
+from utils.nimbus_state import MODEL_PATH
+from utils.session import SessionStore
+from utils.tracing import tracer
+from utils import weather_handler
+
+MAX_BODY_BYTES = 16 * 1024 * 1024
+REAP_INTERVAL_SECONDS = 60
+
+_SESSION_PATH = re.compile(r"^/sessions/([0-9a-f]+)(?:/(text|audio))?$")
+
+
+class NimbusServer(ThreadingHTTPServer):
+    """Serves many dialogue sessions from one process.
+
+    All sessions share the Vosk model, the pooled HTTP client, the forecast
+    cache and the calendar mirror; only the dialogue state is per session.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, sessions: SessionStore, model_path: str = MODEL_PATH):
+        super().__init__(address, NimbusHandler)
+        self.sessions = sessions
+        self.model_path = model_path
+        self._file_asr = None
+        self._asr_lock = threading.Lock()
+
+    def file_asr(self):
+        # Loaded on the first audio request; text-only deployments never need Vosk.
+        with self._asr_lock:
+            if self._file_asr is None:
+                from asr.recognize_file import ASRFileEngine
+                self._file_asr = ASRFileEngine(model_path=self.model_path)
+            return self._file_asr
+
+
+class NimbusHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: NimbusServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, obj: dict, status: int = 200):
+        body = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self) -> bytes:
+        n = int(self.headers.get("Content-Length") or 0)
+        if n > MAX_BODY_BYTES:
+            raise ValueError("Request body too large.")
+        return self.rfile.read(n)
+
+    def _session(self, session_id: str):
+        session = self.server.sessions.get(session_id)
+        if session is None:
+            self._send({"error": "Unknown or expired session."}, 404)
+        return session
+
+    def do_GET(self):
+        if self.path == "/stats":
+            sessions = self.server.sessions
+            return self._send({
+                "sessions": len(sessions),
+                "evicted": sessions.evicted,
+                "api": client.metrics(),
+                "prefetch": weather_handler.prefetcher.stats(),
+                "latency": tracer.summary(),
+            })
+
+        m = _SESSION_PATH.match(self.path)
+        if not m or m.group(2):
+            return self._send({"error": "Not found."}, 404)
+        session = self._session(m.group(1))
+        if session is not None:
+            self._send({
+                "session": session.id,
+                "last_place": session.last_place,
+                "last_day": session.last_day,
+                "last_intent": session.last_intent,
+                "last_created_event_id": session.last_created_event_id,
+            })
+
+    def do_DELETE(self):
+        m = _SESSION_PATH.match(self.path)
+        if not m or m.group(2):
+            return self._send({"error": "Not found."}, 404)
+        if self.server.sessions.close(m.group(1)):
+            return self._send({"ok": True})
+        self._send({"error": "Unknown or expired session."}, 404)
+
+    def do_POST(self):
+        try:
+            body = self._body()
+        except ValueError as e:
+            self.close_connection = True
+            return self._send({"error": str(e)}, 413)
+
+        if self.path == "/sessions":
+            return self._send({"session": self.server.sessions.create().id}, 201)
+
+        m = _SESSION_PATH.match(self.path)
+        if not m or not m.group(2):
+            return self._send({"error": "Not found."}, 404)
+        session = self._session(m.group(1))
+        if session is None:
+            return
+
+        result = {"session": session.id}
+        if m.group(2) == "audio":
+            try:
+                text = self._transcribe(body)
+            except Exception as e:
+                return self._send({"error": f"Could not transcribe audio: {e}"}, 400)
+            result["heard"] = text
+        else:
+            try:
+                text = (json.loads(body or b"{}").get("text") or "").strip()
+            except (ValueError, AttributeError):
+                return self._send({"error": "Expected a JSON body with a 'text' field."}, 400)
+
+        if not text:
+            return self._send({**result, "reply": "Sorry, I didn’t catch that."})
+
+        with session.lock:
+            tracer.begin_turn(mode=m.group(2), session=session.id)
+            try:
+                reply = respond(text, session)
+            except Exception as e:
+                return self._send({**result, "error": str(e)}, 502)
+            finally:
+                tracer.end_turn()
+            result.update(intent=session.last_intent, reply=reply)
+        self._send(result)
+
+    def _transcribe(self, wav: bytes) -> str:
+        fd, path = tempfile.mkstemp(suffix=".wav")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(wav)
+            return self.server.file_asr().transcribe_wav(path)
+        finally:
+            os.remove(path)
+
+
+def _reap(sessions: SessionStore, stop: threading.Event):
+    while not stop.wait(REAP_INTERVAL_SECONDS):
+        sessions.evict_idle()
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Serve Nimbus dialogue sessions over HTTP.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8080)
+    ap.add_argument("--model", default=MODEL_PATH, help="Vosk model path (loaded on first audio request)")
+    ap.add_argument("--idle", type=float, default=None, help="evict sessions idle for this many seconds")
+    args = ap.parse_args(argv)
+
+    sessions = SessionStore() if args.idle is None else SessionStore(idle_seconds=args.idle)
+    server = NimbusServer((args.host, args.port), sessions, model_path=args.model)
+
+    stop = threading.Event()
+    threading.Thread(target=_reap, args=(sessions, stop), name="session-reaper", daemon=True).start()
+
+    print(f"Nimbus serving on http://{args.host}:{server.server_port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+        client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
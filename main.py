@@ -1,12 +1,13 @@
-import sys
+import os
+import asyncio
 from tts.speak import TTSEngine
 
-from utils.intent import detect_intent
-from utils.nimbus_state import MODEL_PATH, context
-from utils.weather_handler import handle_weather
-from utils.calendar_handler import handle_calendar
+from dialogue.loop import converse, respond
+from utils.nimbus_state import MODEL_PATH
+from utils.tracing import TRACE_PATH, tracer
+from utils.weather_handler import prefetch_mentions, prefetcher
 import utils.setup_model as setup_model
-from asr.recognize_file import ASRFileEngine
+from asr.loader import EngineLoader
 
 
 DEMO_AUDIO_FILES = [
@@ -44,50 +45,99 @@ def choose_demo_audio():
 
     return None
 
-def main() -> None:
-    file_asr = None
+def show_partial(partial) -> None:
+    end = "\n" if partial.final else ""
+    print(f"\r ... {partial.text}", end=end, flush=True)
+    prefetch_mentions(partial.text)
+
+def engine_or_none(get, label: str):
+    if get is None:
+        print(f" {label} isn't available (no speech model). Use Type mode.")
+        return None
     try:
-        file_asr = ASRFileEngine(model_path=MODEL_PATH)
+        return get()
     except Exception as e:
-        print(f"File ASR not available ({e}).")
-    
+        print(f" {label} isn't available ({e}). Use Type mode.")
+        return None
+
+def main() -> None:
     tts = TTSEngine()
 
-    asr = None
-    check_asr = True
-
-    while check_asr:
-        try:
-            from asr.recognize import ASREngine
-            asr = ASREngine(model_path=MODEL_PATH)
-            check_asr = False
-
-        except Exception as e:
-            choice = input(f"ASR not available ({e}). Type mode still works. Continue without ASR? [y/n]: ").strip().lower()
-            if choice == "n":
-                try:
-                    setup_model.main()
-                    check_asr = False
-                except Exception as e:
-                    print(f"\nFailed to set up model: {e}\n")
-            else:
-                check_asr = False
+    # The model loads in the background; only Speak, File and spoken Chat wait for it.
+    loader = None
+    while loader is None:
+        if os.path.exists(MODEL_PATH):
+            loader = EngineLoader(MODEL_PATH)
+            break
 
+        choice = input(f"ASR not available (Vosk model path not found: {MODEL_PATH}). Type mode still works. Continue without ASR? [y/n]: ").strip().lower()
+        if choice == "n":
+            try:
+                setup_model.main()
+            except Exception as e:
+                print(f"\nFailed to set up model: {e}\n")
+        else:
+            break
+
+    live_engine = loader.live_engine if loader else None
+    file_engine = loader.file_engine if loader else None
 
     print("Nimbus online.")
 
     while True:
-        print("Modes: [T]ype, [S]peak, [F]ile, [Q]uit")
+        # A turn runs from the user's input to the reply; the mode prompt is idle time.
+        tracer.end_turn()
+        print("Modes: [T]ype, [S]peak, [F]ile, [C]hat, [L]isten, [P]erf, [Q]uit")
         mode = input("\nMode > ").strip().lower()
         if mode in ["q", "quit", "exit"]:
+            tts.close()
+            if TRACE_PATH:
+                n = tracer.export_jsonl(TRACE_PATH)
+                print(f"Wrote {n} traced turns to {TRACE_PATH}.")
             break
-        
+
+        elif mode == "p":
+            print(tracer.format_summary())
+            print("Weather prefetch:", ", ".join(f"{k} {v}" for k, v in prefetcher.stats().items()))
+            continue
+
+        elif mode == "c":
+            # Continuous conversation; the next utterance is taken while the reply is spoken.
+            print("Chat mode: say or type 'stop' to return to the menu.")
+            asr = engine_or_none(live_engine, "Spoken chat") if live_engine else None
+            if asr is not None:
+                capture = lambda: asr.listen_push_to_talk(on_partial=show_partial, on_start=tts.cancel)
+                asyncio.run(converse(capture, tts, mode="speak", empty_reply="Sorry, I didn’t catch that. Please try again."))
+            else:
+                asyncio.run(converse(lambda: input("You: "), tts, mode="type"))
+            continue
+
+        elif mode == "l":
+            # Hands-free: one microphone stream stays open and every pause ends a turn.
+            asr = engine_or_none(live_engine, "Listen mode")
+            if asr is None:
+                continue
+            print("Listening. Just speak; say 'stop' to return to the menu.")
+            # Half-duplex: the microphone is ignored while a reply is playing.
+            utterances = asr.listen_continuous(on_partial=show_partial, hold=lambda: tts.speaking)
+            try:
+                asyncio.run(converse(lambda: next(utterances, None), tts, mode="listen"))
+            finally:
+                utterances.close()
+            continue
+
         elif mode == "f":
             path = choose_demo_audio()
             if not path:
                 print("Invalid selection.")
                 continue
 
+            file_asr = engine_or_none(file_engine, "File ASR")
+            if file_asr is None:
+                continue
+
+            tracer.begin_turn(mode="file", audio=path)
+
             try:
                 text = file_asr.transcribe_wav(path)
             except Exception as e:
@@ -104,10 +154,13 @@ def main() -> None:
                 continue
 
         elif mode == "s":
+            asr = engine_or_none(live_engine, "ASR")
             if asr is None:
-                print(" ASR isn't available. Use Type mode.")
                 continue
-            text = asr.listen_push_to_talk()
+            # barge-in: stop the previous reply so the mic doesn't pick it up
+            tts.cancel()
+            tracer.begin_turn(mode="speak")
+            text = asr.listen_push_to_talk(on_partial=show_partial)
             print(" ASR heard:", text)
             if not text:
                 reply = "Sorry, I didn’t catch that. Please try again."
@@ -116,6 +169,7 @@ def main() -> None:
                 continue
         elif mode == "t":
             text = input("You: ").strip()
+            tracer.begin_turn(mode="type")
         else:
             print("\nWhat are you trying to do? There is no mode for that.\n")
             continue
@@ -123,15 +177,7 @@ def main() -> None:
         if not text:
             continue
 
-        intent = detect_intent(text)
-        context["last_intent"] = intent
-
-        if intent == "weather":
-            reply = handle_weather(text)
-        elif intent == "calendar":
-            reply = handle_calendar(text)
-        else:
-            reply = "Try: 'weather Frankfurt tomorrow' or 'Where is my next appointment?'"
+        reply = respond(text)
 
         print("Bot:", reply)
         tts.say(reply)
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils import calendar_handler
+from utils.calendar_store import CalendarStore
+from utils.session import Session
+
+
+class FakeCalendar:
+    def __init__(self, titles):
+        tomorrow = (datetime.now() + timedelta(days=1)).replace(hour=10, minute=0, second=0, microsecond=0)
+        self.events = {
+            i: {"id": i, "title": t, "start_time": (tomorrow + timedelta(hours=i)).isoformat()}
+            for i, t in enumerate(titles, 1)
+        }
+        self.deleted = []
+
+    def __call__(self, name, *args):
+        if name == "list":
+            return list(self.events.values())
+        if name == "delete":
+            self.deleted.append(args[0])
+            return self.events.pop(args[0])
+        raise AssertionError(f"unexpected call {name}")
+
+
+@pytest.fixture
+def calendar(monkeypatch):
+    def install(*titles):
+        fake = FakeCalendar(titles)
+        store = CalendarStore(fake, calendar_handler._event_start_dt, ttl=3600)
+        monkeypatch.setattr(calendar_handler, "store", store)
+        return fake
+    return install
+
+
+@pytest.mark.parametrize("utterance, title", [
+    ("Delete appointment titled party", "Parts review"),
+    ("delete appointment titled name", "Game night"),
+])
+def test_near_miss_title_deletes_nothing(calendar, utterance, title):
+    fake = calendar(title)
+    reply = calendar_handler.handle_calendar(utterance, Session(id="t"))
+    assert fake.deleted == []
+    assert title in reply
+
+
+def test_exact_title_is_deleted(calendar):
+    fake = calendar("Parts review", "party")
+    reply = calendar_handler.handle_calendar("Delete appointment titled party", Session(id="t"))
+    assert fake.deleted == [2]
+    assert "Deleted appointment 'party'" in reply
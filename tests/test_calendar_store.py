@@ -0,0 +1,65 @@
+import threading
+
+from utils.calendar_store import CalendarStore
+
+
+class SlowCalendar:
+    """Remote calendar whose list() can be held until the test releases it."""
+
+    def __init__(self, events):
+        self.events = {ev["id"]: ev for ev in events}
+        self.listing = threading.Event()
+        self.release = threading.Event()
+        self.hold = False
+        self.next_id = 100
+
+    def __call__(self, name, *args):
+        if name == "list":
+            snapshot = list(self.events.values())
+            if self.hold:
+                self.listing.set()
+                self.release.wait(5)
+            return snapshot
+        if name == "create":
+            self.next_id += 1
+            ev = {**args[0], "id": self.next_id}
+            self.events[ev["id"]] = ev
+            return ev
+        if name == "delete":
+            return self.events.pop(args[0])
+        raise AssertionError(f"unexpected call {name}")
+
+
+def titles(store):
+    return sorted(ev["title"] for ev in store.events())
+
+
+def test_refresh_started_before_a_write_does_not_undo_it():
+    remote = SlowCalendar([{"id": 1, "title": "old"}])
+    store = CalendarStore(remote, lambda ev: None, ttl=3600)
+    assert titles(store) == ["old"]
+
+    remote.hold = True
+    sync = threading.Thread(target=store.refresh)
+    sync.start()
+    remote.listing.wait(5)
+
+    # Both land after the snapshot was taken but before it is applied.
+    store.delete(1)
+    store.create({"title": "party"})
+    remote.hold = False
+    remote.release.set()
+    sync.join()
+
+    assert titles(store) == ["party"]
+    assert sorted(ev["title"] for ev in remote.events.values()) == ["party"]
+
+
+def test_refresh_without_writes_applies_remote_changes():
+    remote = SlowCalendar([{"id": 1, "title": "old"}])
+    store = CalendarStore(remote, lambda ev: None, ttl=3600)
+    assert titles(store) == ["old"]
+
+    remote.events = {2: {"id": 2, "title": "new"}}
+    assert store.refresh()
+    assert titles(store) == ["new"]
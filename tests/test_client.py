@@ -0,0 +1,127 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import api.client
+from api.client import HTTPClient
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Stub(BaseHTTPRequestHandler):
+    """Answers 503 for the first `failures` requests, then 200 with a JSON body."""
+
+    protocol_version = "HTTP/1.1"
+    failures = 0
+    hits = []
+
+    def log_message(self, *args):
+        pass
+
+    def _answer(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        type(self).hits.append((self.command, self.path, body))
+        if type(self).failures > 0:
+            type(self).failures -= 1
+            code, payload = 503, {"error": "busy"}
+        elif self.path.endswith("weather.php"):
+            code, payload = 200, {"place": "Marburg", "forecast": [{"day": "Today", "weather": "rain"}]}
+        else:
+            code, payload = 200, {"ok": True}
+        data = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _answer
+
+
+@pytest.fixture
+def stub():
+    Stub.failures = 0
+    Stub.hits = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Stub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    # Always back off by the full cap and record it instead of sleeping.
+    slept = []
+    monkeypatch.setattr(api.client.random, "uniform", lambda lo, hi: hi)
+    monkeypatch.setattr(api.client.time, "sleep", slept.append)
+    return slept
+
+
+def test_get_is_retried_until_it_succeeds(stub, delays):
+    Stub.failures = 2
+    client = HTTPClient(max_retries=2, backoff_base=0.1, backoff_max=1.0)
+    r = client.get(f"{stub}/calendar.php", endpoint="list")
+    assert r.status_code == 200
+    assert len(Stub.hits) == 3
+    assert delays == [0.1, 0.2]
+    stats = client.metrics()["list"]
+    assert (stats["count"], stats["errors"], stats["retries"]) == (3, 2, 2)
+
+
+def test_backoff_is_capped(stub, delays):
+    Stub.failures = 3
+    client = HTTPClient(max_retries=3, backoff_base=0.1, backoff_max=0.15)
+    assert client.get(stub).status_code == 200
+    assert delays == [0.1, 0.15, 0.15]
+
+
+def test_last_response_is_returned_once_retries_run_out(stub, delays):
+    Stub.failures = 10
+    client = HTTPClient(max_retries=2, backoff_base=0)
+    r = client.get(stub, endpoint="list")
+    assert r.status_code == 503
+    assert len(Stub.hits) == 3
+    assert client.metrics()["list"]["errors"] == 3
+    assert client.metrics()["list"]["retries"] == 2
+
+
+def test_post_is_not_retried_unless_marked_idempotent(stub, delays):
+    Stub.failures = 1
+    client = HTTPClient(max_retries=2, backoff_base=0)
+    assert client.post(stub, data=b"{}").status_code == 503
+    assert len(Stub.hits) == 1
+
+    Stub.failures = 1
+    assert client.post(stub, data=b"{}", idempotent=True).status_code == 200
+    assert len(Stub.hits) == 3
+
+
+def test_connection_errors_are_retried_then_raised(delays):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    client = HTTPClient(max_retries=2, backoff_base=0.1)
+    with pytest.raises(requests.ConnectionError):
+        client.get(f"http://127.0.0.1:{port}/", endpoint="down")
+    assert len(delays) == 2
+    assert client.metrics()["down"]["errors"] == 3
+    assert client.metrics()["down"]["retries"] == 2
+
+
+def test_api_root_comes_from_the_environment(stub):
+    Stub.failures = 1
+    script = "from api.weather import get_forecast; print(get_forecast('marburg')['place'])"
+    env = dict(os.environ, NIMBUS_API_ROOT=stub + "/")
+    out = subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=env, capture_output=True, text=True, timeout=30)
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.strip() == "Marburg"
+    assert [(m, p) for m, p, _ in Stub.hits] == [("POST", "/weather.php")] * 2
+    assert Stub.hits[-1][2] == b"place=marburg"
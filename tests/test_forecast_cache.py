@@ -0,0 +1,74 @@
+import json
+import threading
+import time
+
+from api.forecast_cache import ForecastCache, Prefetcher
+
+
+def forecast(place):
+    return {"place": place.title(), "forecast": [{"day": "Today", "weather": "rain"}]}
+
+
+def test_concurrent_lookups_share_one_fetch():
+    calls = []
+    release = threading.Event()
+
+    def fetch(place):
+        calls.append(place)
+        release.wait(5)
+        return forecast(place)
+
+    cache = ForecastCache(fetch)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("marburg"))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert calls == ["marburg"]
+    assert len(results) == 8 and all(r is results[0] for r in results)
+    assert cache.misses == 1 and cache.coalesced == 7
+
+
+def test_concurrent_writes_leave_a_valid_file(tmp_path):
+    path = tmp_path / "forecast.json"
+    cache = ForecastCache(forecast, path=str(path), save_delay=0.0)
+
+    def writer(n):
+        for i in range(20):
+            cache.put(f"city{n}-{i}", forecast(f"city{n}-{i}"))
+            cache.flush()
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    cache.flush()
+
+    assert len(json.loads(path.read_text())) == cache.max_entries
+    assert not list(tmp_path.glob("*.tmp"))
+    assert len(ForecastCache(forecast, path=str(path)).places()) == cache.max_entries
+
+
+def test_put_does_not_write_on_the_lookup_path(tmp_path):
+    path = tmp_path / "forecast.json"
+    cache = ForecastCache(forecast, path=str(path), save_delay=0.2)
+    cache.get("marburg")
+    assert not path.exists()
+    time.sleep(0.5)
+    assert "marburg" in json.loads(path.read_text())
+
+
+def test_warm_sweeps_known_places_once_per_window():
+    cache = ForecastCache(forecast)
+    prefetcher = Prefetcher(cache, max_workers=1)
+    try:
+        prefetcher.warm(["berlin", "hamburg"], every=600)
+        prefetcher.warm(["berlin", "hamburg", "munich"], every=600)
+        assert prefetcher.issued == 2
+    finally:
+        prefetcher.close()
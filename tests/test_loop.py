@@ -0,0 +1,73 @@
+import asyncio
+import time
+
+from dialogue import loop
+from utils.nlu import parse
+from utils.session import Session
+from utils.tracing import tracer
+
+
+def test_a_turn_records_one_nlu_span(monkeypatch):
+    def handle_calendar(text, session):
+        # Stands in for the real handler, which parses and then calls the API.
+        parse(text, intent="calendar")
+        return "ok"
+
+    monkeypatch.setattr(loop, "handle_calendar", handle_calendar)
+    turn = tracer.begin_turn(mode="type")
+    assert loop.respond("where is my next appointment", Session(id="t")) == "ok"
+    tracer.end_turn()
+    assert [sp["name"] for sp in turn["spans"]] == ["nlu"]
+
+
+class FakeTTS:
+    def __init__(self):
+        self.said = []
+
+    def say(self, text):
+        self.said.append(text)
+
+
+def scripted(*lines):
+    lines = list(lines)
+    asked = []
+
+    def capture():
+        asked.append(lines[0])
+        return lines.pop(0)
+    return capture, asked
+
+
+def test_converse_answers_in_order_and_stops_on_a_stop_word(monkeypatch):
+    def respond(text, session=None):
+        # Earlier turns take longer, so a reordering loop would show up.
+        time.sleep(0.05 if text == "first" else 0.0)
+        return f"re: {text}"
+
+    monkeypatch.setattr(loop, "respond", respond)
+    capture, asked = scripted("first", "  second ", "", "third", "Stop", "never")
+    tts = FakeTTS()
+    asyncio.run(loop.converse(capture, tts, empty_reply="Say that again?"))
+    assert tts.said == ["re: first", "re: second", "Say that again?", "re: third"]
+    assert asked == ["first", "  second ", "", "third", "Stop"]
+
+
+def test_converse_ends_when_capture_runs_out(monkeypatch):
+    monkeypatch.setattr(loop, "respond", lambda text, session=None: f"re: {text}")
+    capture, _ = scripted("hello", None)
+    tts = FakeTTS()
+    asyncio.run(loop.converse(capture, tts))
+    assert tts.said == ["re: hello"]
+
+
+def test_converse_reports_handler_errors_and_keeps_going(monkeypatch):
+    def respond(text, session=None):
+        if text == "boom":
+            raise RuntimeError("api down")
+        return f"re: {text}"
+
+    monkeypatch.setattr(loop, "respond", respond)
+    capture, _ = scripted("boom", "after", "exit")
+    tts = FakeTTS()
+    asyncio.run(loop.converse(capture, tts))
+    assert tts.said == ["Sorry, something went wrong: api down", "re: after"]
@@ -0,0 +1,116 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from asr.wav import WavFile
+from dialogue import server as server_module
+from dialogue.server import NimbusServer
+from utils.session import SessionStore
+
+
+class WavOnlyASR:
+    """Stands in for the Vosk engine: parses the upload, then returns canned text."""
+
+    def transcribe_wav(self, path):
+        with WavFile(path):
+            return "weather in hamburg"
+
+
+def fake_respond(text, session):
+    session.last_intent = "weather"
+    session.last_place = text.split()[-1].title()
+    return f"Weather in {session.last_place}."
+
+
+@pytest.fixture
+def nimbus(monkeypatch):
+    monkeypatch.setattr(server_module, "respond", fake_respond)
+    sessions = SessionStore(idle_seconds=3600)
+    srv = NimbusServer(("127.0.0.1", 0), sessions)
+    srv._file_asr = WavOnlyASR()
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{srv.server_port}", sessions
+    srv.shutdown()
+    srv.server_close()
+
+
+def new_session(url):
+    r = requests.post(f"{url}/sessions")
+    assert r.status_code == 201
+    return r.json()["session"]
+
+
+def test_sessions_keep_their_own_state(nimbus):
+    url, sessions = nimbus
+    a, b = new_session(url), new_session(url)
+    assert requests.post(f"{url}/sessions/{a}/text", json={"text": "weather in berlin"}).json()["reply"] == "Weather in Berlin."
+    assert requests.post(f"{url}/sessions/{b}/text", json={"text": "weather in munich"}).json()["reply"] == "Weather in Munich."
+
+    assert requests.get(f"{url}/sessions/{a}").json()["last_place"] == "Berlin"
+    assert requests.get(f"{url}/sessions/{b}").json()["last_place"] == "Munich"
+    assert len(sessions) == 2
+
+
+@pytest.mark.parametrize("body", [b"not json", b"[1, 2]"])
+def test_bad_json_body_is_a_400(nimbus, body):
+    url, _ = nimbus
+    sid = new_session(url)
+    r = requests.post(f"{url}/sessions/{sid}/text", data=body)
+    assert r.status_code == 400
+    assert "text" in r.json()["error"]
+
+
+def test_bad_audio_is_a_400(nimbus):
+    url, _ = nimbus
+    sid = new_session(url)
+    r = requests.post(f"{url}/sessions/{sid}/audio", data=b"RIFF but not really a wav file")
+    assert r.status_code == 400
+    assert r.json()["error"].startswith("Could not transcribe audio")
+
+
+def test_unknown_and_closed_sessions_are_404(nimbus):
+    url, _ = nimbus
+    assert requests.post(f"{url}/sessions/abc123/text", json={"text": "hi"}).status_code == 404
+    sid = new_session(url)
+    assert requests.delete(f"{url}/sessions/{sid}").json() == {"ok": True}
+    assert requests.get(f"{url}/sessions/{sid}").status_code == 404
+    assert requests.delete(f"{url}/sessions/{sid}").status_code == 404
+
+
+def test_stats_counts_sessions(nimbus):
+    url, _ = nimbus
+    new_session(url)
+    stats = requests.get(f"{url}/stats").json()
+    assert stats["sessions"] == 1
+    assert stats["evicted"] == 0
+
+
+def test_reaper_evicts_idle_sessions(monkeypatch):
+    monkeypatch.setattr(server_module, "REAP_INTERVAL_SECONDS", 0.01)
+    sessions = SessionStore(idle_seconds=0.05)
+    stale = sessions.create()
+    stop = threading.Event()
+    reaper = threading.Thread(target=server_module._reap, args=(sessions, stop), daemon=True)
+    reaper.start()
+    try:
+        deadline = time.time() + 2
+        while len(sessions) and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        stop.set()
+        reaper.join(1)
+    assert len(sessions) == 0
+    assert sessions.evicted == 1
+    assert sessions.get(stale.id) is None
+
+
+def test_store_drops_the_least_recently_used_session():
+    sessions = SessionStore(idle_seconds=3600, max_sessions=2)
+    a, b = sessions.create(), sessions.create()
+    assert sessions.get(a.id) is a
+    sessions.create()
+    assert sessions.get(b.id) is None
+    assert sessions.get(a.id) is a
+    assert sessions.evicted == 1
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import shutil
+import zipfile
+
+import pytest
+
+from utils import setup_model
+
+CHUNK = 1000
+
+
+def make_zip(path):
+    with zipfile.ZipFile(path, "w") as zf:
+        for name in setup_model.REQUIRED_FILES + ["graph/HCLG.fst", "rnnlm/final.raw"]:
+            # Incompressible content so the zip spans several chunks.
+            zf.writestr(f"vosk-model-en-us-0.22/{name}", os.urandom(1500), compress_type=zipfile.ZIP_STORED)
+    with open(path, "rb") as f:
+        data = f.read()
+    return data, hashlib.sha256(data).hexdigest()
+
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(setup_model, "CHUNK_BYTES", CHUNK)
+    monkeypatch.setattr(setup_model, "READ_BYTES", 256)
+    path = tmp_path / "mirror" / "model.zip"
+    path.parent.mkdir()
+    data, digest = make_zip(path)
+    return path.as_uri(), data, digest
+
+
+def test_file_url_downloads_extracts_and_verifies(source):
+    url, _, digest = source
+    setup_model.main(["--url", url, "--sha256", digest, "--lean"])
+    assert setup_model.verify_model()
+    assert not os.path.exists(os.path.join(setup_model.MODEL_DIR, "rnnlm"))
+    assert not os.path.exists(setup_model.ZIP_PATH)
+
+
+def test_checksum_mismatch_discards_the_download(source):
+    url, _, _ = source
+    with pytest.raises(IOError, match="Checksum mismatch"):
+        setup_model.download_model(url, "0" * 64)
+    assert not os.path.exists(setup_model.ZIP_PATH)
+    assert not os.path.exists(setup_model.ZIP_PATH + ".part")
+
+
+def test_interrupted_download_resumes_from_finished_chunks(source, monkeypatch):
+    url, data, digest = source
+    part = setup_model.ZIP_PATH + ".part"
+    os.makedirs("models")
+    with open(part, "wb") as f:
+        f.write(data[:2 * CHUNK] + b"\0" * (len(data) - 2 * CHUNK))
+    with open(part + ".json", "w") as f:
+        json.dump({"url": url, "size": len(data), "done": [0, 1]}, f)
+
+    starts = []
+    read_range = setup_model._read_range
+
+    def recording(url, start, end, session=None):
+        starts.append(start)
+        return read_range(url, start, end, session)
+
+    monkeypatch.setattr(setup_model, "_read_range", recording)
+    setup_model.download_model(url, digest)
+
+    chunks = (len(data) + CHUNK - 1) // CHUNK
+    assert sorted(starts) == [i * CHUNK for i in range(2, chunks)]
+    with open(setup_model.ZIP_PATH, "rb") as f:
+        assert f.read() == data
+    assert not os.path.exists(part + ".json")
+
+
+def test_state_for_another_source_is_ignored(source, monkeypatch):
+    url, data, digest = source
+    part = setup_model.ZIP_PATH + ".part"
+    os.makedirs("models")
+    with open(part, "wb") as f:
+        f.write(b"\0" * len(data))
+    with open(part + ".json", "w") as f:
+        json.dump({"url": "file:///elsewhere.zip", "size": len(data), "done": [0, 1]}, f)
+
+    setup_model.download_model(url, digest)
+    with open(setup_model.ZIP_PATH, "rb") as f:
+        assert f.read() == data
+
+
+def test_parallel_extraction_shares_new_folders(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("models")
+    with zipfile.ZipFile(setup_model.ZIP_PATH, "w") as zf:
+        zf.writestr("vosk-model-en-us-0.22/graph/", b"")
+        for d in range(40):
+            for f in range(8):
+                zf.writestr(f"vosk-model-en-us-0.22/d{d}/sub/f{f}", b"x" * 100)
+    # The collision is timing-dependent, so give it several chances.
+    for _ in range(5):
+        setup_model.extract_model(workers=8, keep_zip=True)
+        assert os.path.isdir(os.path.join(setup_model.MODEL_DIR, "graph"))
+        assert len(os.listdir(os.path.join(setup_model.MODEL_DIR, "d39", "sub"))) == 8
+        shutil.rmtree(setup_model.MODEL_DIR)
+
+
+@pytest.mark.parametrize("with_sha", [True, False])
+def test_broken_zip_from_an_earlier_run_is_downloaded_again(source, with_sha):
+    url, data, digest = source
+    os.makedirs("models")
+    with open(setup_model.ZIP_PATH, "wb") as f:
+        f.write(data[:len(data) // 2])
+
+    args = ["--url", url, "--keep-zip"] + (["--sha256", digest] if with_sha else [])
+    setup_model.main(args)
+    assert setup_model.verify_model()
+    with open(setup_model.ZIP_PATH, "rb") as f:
+        assert f.read() == data
+
+
+def test_intact_zip_from_an_earlier_run_is_reused(source, monkeypatch):
+    url, data, digest = source
+    os.makedirs("models")
+    with open(setup_model.ZIP_PATH, "wb") as f:
+        f.write(data)
+
+    def no_download(*args):
+        raise AssertionError("downloaded again")
+
+    monkeypatch.setattr(setup_model, "download_model", no_download)
+    setup_model.main(["--url", url, "--sha256", digest])
+    assert setup_model.verify_model()
@@ -0,0 +1,39 @@
+import wave
+
+import numpy as np
+
+from asr.vad import EnergyVAD
+
+SAMPLE = "samples/01_What_will_the_weather_be_like_today_in_Marburg.wav"
+
+
+def frames(signal, vad):
+    n = vad.frame_samples
+    for i in range(0, len(signal) - n + 1, n):
+        yield signal[i:i + n].astype(np.int16).tobytes()
+
+
+def hiss(seconds, rms, seed=0):
+    rng = np.random.default_rng(seed)
+    x = rng.standard_normal(int(16000 * seconds))
+    return x / np.sqrt(np.mean(x * x)) * rms
+
+
+def test_steady_hiss_below_the_gate_stops_counting_as_speech():
+    vad = EnergyVAD()
+    noise = np.concatenate([hiss(1, 200, 1), hiss(1, 250, 2), hiss(3, 225, 3)])
+    decisions = [vad.is_speech(f) for f in frames(noise, vad)]
+    # Allowed to fool the detector briefly, but the tail must read as silence.
+    assert not any(decisions[-50:])
+
+
+def test_speech_is_still_detected_over_hiss():
+    with wave.open(SAMPLE, "rb") as wf:
+        speech = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16).astype(np.float64)
+    vad = EnergyVAD()
+    for f in frames(hiss(4, 225), vad):
+        vad.is_speech(f)
+
+    mixed = speech + hiss(len(speech) / 16000, 225, 4)
+    decisions = [vad.is_speech(f) for f in frames(mixed, vad)]
+    assert sum(decisions) > len(decisions) // 3
@@ -0,0 +1,35 @@
+import struct
+
+import numpy as np
+import pytest
+
+from asr.wav import WavFile
+
+
+def write_wav(path, samples, channels=1, rate=16000, bits=16, block_align=None):
+    data = np.asarray(samples, dtype="<i2").tobytes()
+    if block_align is None:
+        block_align = channels * bits // 8
+    fmt = struct.pack("<HHIIHH", 1, channels, rate, rate * block_align, block_align, bits)
+    body = b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt + b"data" + struct.pack("<I", len(data)) + data
+    path.write_bytes(b"RIFF" + struct.pack("<I", len(body)) + body)
+    return str(path)
+
+
+def test_reads_pcm16_mono(tmp_path):
+    with WavFile(write_wav(tmp_path / "a.wav", [0, 100, -100, 32767])) as wav:
+        assert (wav.channels, wav.bits, wav.frames) == (1, 16, 4)
+        assert wav.mono(0, 4).tolist() == [0, 100, -100, 32767]
+
+
+@pytest.mark.parametrize("channels,bits,block_align", [
+    (1, 16, 0),
+    (0, 16, 2),
+    (2, 16, 3),
+    (1, 0, 0),
+    (1, 12, 2),
+])
+def test_malformed_format_chunk_is_rejected(tmp_path, channels, bits, block_align):
+    path = write_wav(tmp_path / "bad.wav", [0] * 8, channels=channels, bits=bits, block_align=block_align)
+    with pytest.raises(ValueError, match="Unsupported WAV format"):
+        WavFile(path)
@@ -0,0 +1,82 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class AudioCache:
+    """Content-addressed on-disk LRU cache of rendered utterances.
+
+    Files are named by a hash of (text, rate, volume). Recency survives
+    restarts through the file mtime, which is bumped on every hit.
+    """
+
+    def __init__(self, directory: str, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+
+        os.makedirs(directory, exist_ok=True)
+        found = []
+        for name in os.listdir(directory):
+            if not name.endswith(".wav"):
+                continue
+            path = os.path.join(directory, name)
+            st = os.stat(path)
+            found.append((st.st_mtime, name[:-4], st.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._bytes += size
+
+    @staticmethod
+    def key(text: str, rate: int, volume: float) -> str:
+        raw = f"{rate}|{volume:.3f}|{text}".encode("utf-8")
+        return hashlib.sha256(raw).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".wav")
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            path = self.path(key)
+            if not os.path.exists(path):
+                self._bytes -= self._entries.pop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def put(self, key: str, rendered_path: str) -> str:
+        path = self.path(key)
+        os.replace(rendered_path, path)
+        size = os.path.getsize(path)
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)
+            self._entries[key] = size
+            self._bytes += size
+            self._evict()
+        return path
+
+    def _evict(self):
+        # The newest entry is never evicted, so put() always returns a playable file.
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            key, size = self._entries.popitem(last=False)
+            self._bytes -= size
+            try:
+                os.remove(self.path(key))
+            except OSError:
+                pass
@@ -1,38 +1,201 @@
-import pyttsx3
 import threading
+import queue
+import wave
 import os
 
+from tts.cache import AudioCache
+from utils.nimbus_state import TTS_CACHE_DIR
+from utils.tracing import span, tracer
+
 class TTSEngine:
-    def __init__(self, rate: int = 175, volume: float = 1.0):
+    """Speaks replies on one long-lived pyttsx3 engine owned by a worker thread.
+
+    say() only queues the text; cancel() cuts off the current utterance and
+    drops anything still queued (barge-in); flush() waits for the queue to drain.
+    With a cache directory, a reply heard for the second time is rendered to
+    WAV after it has been spoken, and replayed from disk from then on.
+    """
+
+    def __init__(self, rate: int = 175, volume: float = 1.0, cache_dir: str | None = TTS_CACHE_DIR):
         self.enabled = True
         self.rate = rate
         self.volume = volume
-        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._generation = 0
+        self._speaking_generation = 0
+        self._thread = None
+        self.cache = None
+        self._heard = set()
 
         if os.path.exists("/.dockerenv"):
             self.enabled = False
 
-    def say(self, text: str):
-        if not text:
-            return
-        
-        if not self.enabled:
-            return
-        
-        with self._lock:
+        if self.enabled:
+            if cache_dir:
+                try:
+                    self.cache = AudioCache(cache_dir)
+                except OSError as e:
+                    print(f"TTS cache not available ({e}).")
+            self._thread = threading.Thread(target=self._run, name="tts", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        try:
+            # Imported on the worker so start-up never waits for the speech driver.
+            import pyttsx3
             engine = pyttsx3.init()
             engine.setProperty("rate", self.rate)
             engine.setProperty("volume", self.volume)
+            engine.connect("started-word", lambda name, location, length: self._check_cancel(engine))
+        except Exception as e:
+            print(f"TTS not available ({e}).")
+            self.enabled = False
+            engine = None
 
+        while True:
+            item = self._queue.get()
             try:
-                engine.stop()
-            except Exception:
-                pass
+                if item is None:
+                    break
 
-            engine.say(text)
-            engine.runAndWait()
+                generation, text, out_path, done, turn = item
+                if out_path is not None:
+                    self._speaking_generation = self._generation
+                    ok = engine is not None and self._render(engine, text, out_path)
+                    done.append(ok)
+                    continue
+
+                if engine is None or generation != self._generation:
+                    continue
 
+                self._speaking_generation = generation
+                try:
+                    # Recorded against the turn that queued the reply, not this thread's.
+                    with span("tts", turn=turn):
+                        cached = self._play_cached(text, generation)
+                        if not cached:
+                            engine.say(text)
+                            engine.runAndWait()
+                    if not cached:
+                        self._cache_repeat(engine, text, generation)
+                except Exception:
+                    pass
+            finally:
+                self._queue.task_done()
+
+    def _check_cancel(self, engine):
+        if self._speaking_generation != self._generation:
             try:
                 engine.stop()
             except Exception:
                 pass
+
+    def _render(self, engine, text: str, out_path: str) -> bool:
+        try:
+            engine.save_to_file(text, out_path)
+            engine.runAndWait()
+        except Exception:
+            return False
+        if not os.path.exists(out_path):
+            return False
+        try:
+            # Some drivers (e.g. nsss on macOS) write AIFF; only keep real WAVs.
+            with wave.open(out_path, "rb"):
+                return True
+        except (wave.Error, EOFError):
+            os.remove(out_path)
+            return False
+
+    def _play_cached(self, text: str, generation: int) -> bool:
+        if self.cache is None:
+            return False
+        path = self.cache.get(AudioCache.key(text, self.rate, self.volume))
+        return path is not None and self._play_wav(path, generation)
+
+    def _cache_repeat(self, engine, text: str, generation: int):
+        # A miss is spoken live first; the render happens afterwards, and only
+        # for phrases heard before, so one-off replies never pay for it.
+        if self.cache is None:
+            return
+        key = AudioCache.key(text, self.rate, self.volume)
+        if key not in self._heard:
+            if len(self._heard) >= 4 * self.cache.max_entries:
+                self._heard.clear()
+            self._heard.add(key)
+            return
+        # Leave it for the next repeat if another reply is already waiting.
+        if generation != self._generation or not self._queue.empty():
+            return
+        tmp = self.cache.path(key) + ".tmp"
+        if not self._render(engine, text, tmp):
+            return
+        if generation != self._generation:
+            # Cut off by a barge-in; the file may be truncated.
+            os.remove(tmp)
+            return
+        self.cache.put(key, tmp)
+        self._heard.discard(key)
+
+    def _play_wav(self, path: str, generation: int) -> bool:
+        try:
+            import sounddevice as sd
+        except Exception:
+            return False
+
+        dtypes = {1: "uint8", 2: "int16", 4: "int32"}
+        try:
+            with wave.open(path, "rb") as wf:
+                dtype = dtypes.get(wf.getsampwidth())
+                if dtype is None:
+                    return False
+                with sd.RawOutputStream(
+                    samplerate=wf.getframerate(),
+                    channels=wf.getnchannels(),
+                    dtype=dtype,
+                ) as stream:
+                    while generation == self._generation:
+                        data = wf.readframes(1024)
+                        if not data:
+                            break
+                        stream.write(data)
+        except Exception:
+            return False
+        return True
+
+    @property
+    def speaking(self) -> bool:
+        """True while a reply is queued or playing."""
+        return self._queue.unfinished_tasks > 0
+
+    def say(self, text: str):
+        if not text:
+            return
+
+        if not self.enabled:
+            return
+
+        self._queue.put((self._generation, text, None, None, tracer.current_turn()))
+
+    def render_to_file(self, text: str, path: str) -> bool:
+        """Synthesize text into a WAV file at path; blocks until it is written."""
+        if not text or self._thread is None:
+            return False
+        done = []
+        self._queue.put((self._generation, text, path, done, None))
+        self._queue.join()
+        return bool(done and done[0])
+
+    def cancel(self):
+        # Queued items from an older generation are skipped by the worker, and
+        # the utterance in progress stops at its next word boundary.
+        self._generation += 1
+
+    def flush(self):
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
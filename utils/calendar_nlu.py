@@ -2,29 +2,26 @@ import re
 from datetime import datetime
 from dateutil import parser as dateparser
 
+from utils import nlu
+from utils.nlu import scan
+
 def is_next_query(text: str) -> bool:
-    t = text.lower()
-    return any(p in t for p in ["next appointment", "next meeting", "next event", "my next appointment", "where is my next"])
+    return nlu.is_next_query(scan(text))
 
 def is_delete_previous(text: str) -> bool:
-    t = text.lower()
-    return "delete" in t and any(p in t for p in ["previous", "previously created", "last one", "that appointment"])
+    return nlu.is_delete_previous(scan(text))
 
 def is_add(text: str) -> bool:
-    t = text.lower()
-    return any(p in t for p in ["add", "create", "schedule"]) and any(p in t for p in ["appointment", "meeting", "event"])
+    return nlu.is_add(scan(text))
 
 def parse_add(text: str) -> dict | None:
     t = text.strip()
 
-    title = None
-    m = re.search(r"\b(titled|called)\s+(.+?)(?:\s+for|\s+on|\s+at|$)", t, flags=re.IGNORECASE)
-    if m:
-        title = m.group(2).strip()
+    title = nlu.add_title_of(scan(t))
 
     candidate = t
-    if m:
-        candidate = t.replace(m.group(0), " ")
+    if title:
+        candidate = re.sub(r"\b(titled|called)\s+" + re.escape(title), " ", t, count=1, flags=re.IGNORECASE)
 
     try:
         dt = dateparser.parse(candidate, fuzzy=True, dayfirst=True)
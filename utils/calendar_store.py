@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import re
+import bisect
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from utils.nimbus_state import known_titles
+from utils.title_index import TitleIndex
+
+
+def parse_events(raw) -> list:
+    if isinstance(raw, list):
+        return raw
+    if isinstance(raw, dict):
+        for k in ["events", "data", "items"]:
+            if k in raw and isinstance(raw[k], list):
+                return raw[k]
+    return []
+
+
+def event_id(ev: dict):
+    return ev.get("id") or ev.get("event_id")
+
+
+def normalize_title(s: str) -> str:
+    return re.sub(r"\s+", " ", (s or "").strip().lower())
+
+
+class CalendarStore:
+    """Local write-through mirror of the remote calendar.
+
+    Reads are served from memory. Creates, updates and deletes go to the
+    remote API first and are then applied locally. Once the mirror is older
+    than ``ttl`` it is re-synced in the background while the current copy
+    keeps serving; a sync only touches events that actually changed.
+
+    Events are also kept sorted by parsed start time, so "next" and
+    day-scoped lookups are a bisect rather than a parse-and-sort of everything,
+    and titles are kept in an inverted index for ranked, typo-tolerant search.
+    """
+
+    def __init__(self, call, start_time, ttl: float = 30.0):
+        self._call = call
+        self._start_time = start_time
+        self.ttl = ttl
+        self._events = {}
+        self._starts = {}
+        self._by_start = []
+        self._titles = TitleIndex()
+        self._synced_at = None
+        self._refreshing = False
+        # Bumped by every local write; a sync whose snapshot predates one is dropped.
+        self._writes = 0
+        self._lock = threading.RLock()
+
+    def _key(self, eid) -> str:
+        return str(eid)
+
+    def _put(self, ev: dict):
+        key = self._key(event_id(ev))
+        self._remove(key)
+        self._events[key] = ev
+        self._titles.add(key, normalize_title(ev.get("title", "")))
+        dt = self._start_time(ev)
+        if dt is not None:
+            self._starts[key] = dt
+            bisect.insort(self._by_start, (dt, key))
+
+    def _remove(self, key: str):
+        self._events.pop(key, None)
+        self._titles.remove(key)
+        dt = self._starts.pop(key, None)
+        if dt is not None:
+            i = bisect.bisect_left(self._by_start, (dt, key))
+            if i < len(self._by_start) and self._by_start[i] == (dt, key):
+                del self._by_start[i]
+
+    def _changed(self):
+        # Keep the ASR grammar in step with what is actually on the calendar.
+        known_titles.clear()
+        known_titles.update(normalize_title(ev.get("title", "")) for ev in self._events.values() if ev.get("title"))
+
+    def refresh(self) -> bool:
+        with self._lock:
+            writes = self._writes
+        remote = {}
+        for ev in parse_events(self._call("list")):
+            if event_id(ev) is not None:
+                remote[self._key(event_id(ev))] = ev
+
+        with self._lock:
+            if self._writes != writes:
+                # A create, update or delete landed while the list was in
+                # flight; the snapshot may undo it. Stay stale and retry later.
+                return False
+            for key in list(self._events):
+                if key not in remote:
+                    self._remove(key)
+            for key, ev in remote.items():
+                if self._events.get(key) != ev:
+                    self._put(ev)
+            self._synced_at = time.monotonic()
+            self._changed()
+        return True
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception:
+            pass
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _ensure_fresh(self):
+        with self._lock:
+            synced_at = self._synced_at
+            stale = synced_at is None or time.monotonic() - synced_at >= self.ttl
+            if stale and synced_at is not None and not self._refreshing:
+                self._refreshing = True
+                threading.Thread(target=self._refresh_in_background, daemon=True).start()
+
+        if synced_at is None:
+            # The caller needs a synced mirror; retry if a write raced the list.
+            for _ in range(3):
+                if self.refresh():
+                    break
+
+    def events(self) -> list:
+        self._ensure_fresh()
+        with self._lock:
+            return list(self._events.values())
+
+    def in_range(self, start: datetime, end: datetime) -> list:
+        """(start_dt, event) pairs with start <= start_dt < end, in time order."""
+        self._ensure_fresh()
+        with self._lock:
+            lo = bisect.bisect_left(self._by_start, (start,))
+            hi = bisect.bisect_left(self._by_start, (end,))
+            return [(dt, self._events[key]) for dt, key in self._by_start[lo:hi]]
+
+    def upcoming(self, now: datetime) -> list:
+        self._ensure_fresh()
+        with self._lock:
+            lo = bisect.bisect_left(self._by_start, (now,))
+            return [(dt, self._events[key]) for dt, key in self._by_start[lo:]]
+
+    def next_after(self, now: datetime):
+        self._ensure_fresh()
+        with self._lock:
+            i = bisect.bisect_left(self._by_start, (now,))
+            if i == len(self._by_start):
+                return None
+            dt, key = self._by_start[i]
+            return dt, self._events[key]
+
+    def on_date(self, d: date) -> list:
+        start = datetime.combine(d, datetime.min.time())
+        return self.in_range(start, start + timedelta(days=1))
+
+    def search_title(self, query: str, limit: int | None = None) -> list:
+        """(score, event) pairs for titles matching query, best first."""
+        self._ensure_fresh()
+        with self._lock:
+            ranked = self._titles.search(normalize_title(query), limit)
+            return [(score, self._events[key]) for score, key in ranked]
+
+    def get(self, eid) -> dict | None:
+        with self._lock:
+            return self._events.get(self._key(eid))
+
+    def invalidate(self):
+        with self._lock:
+            self._synced_at = None
+
+    def create(self, event: dict):
+        created = self._call("create", event)
+
+        with self._lock:
+            self._writes += 1
+            if isinstance(created, dict) and event_id(created) is not None:
+                self._put({**event, **created})
+                self._changed()
+            else:
+                # No id to key the local copy on; re-sync on the next read.
+                self._synced_at = None
+        return created
+
+    def update(self, eid, patch: dict):
+        updated = self._call("update", eid, patch)
+
+        with self._lock:
+            self._writes += 1
+            key = self._key(eid)
+            if isinstance(updated, dict) and event_id(updated) is not None:
+                self._put({**self._events.get(key, {}), **updated})
+            elif key in self._events:
+                self._put({**self._events[key], **patch})
+            self._changed()
+        return updated
+
+    def delete(self, eid):
+        res = self._call("delete", eid)
+
+        with self._lock:
+            self._writes += 1
+            self._remove(self._key(eid))
+            self._changed()
+        return res
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import threading
+import warnings
+from collections import OrderedDict
+
+import numpy as np
+
+# Condition bits; a description such as "thunderstorm with light rain" sets several.
+CONDITION_BITS = {
+    "rain": 1,
+    "snow": 2,
+    "clouds": 4,
+    "clear sky": 8,
+    "mist": 16,
+    "thunderstorm": 32,
+}
+
+# Substring that marks each condition in the API's weather description.
+_CONDITION_MARKERS = {
+    "rain": "rain",
+    "snow": "snow",
+    "clouds": "cloud",
+    "clear sky": "clear sky",
+    "mist": "mist",
+    "thunderstorm": "thunderstorm",
+}
+
+
+def condition_code(weather: str) -> int:
+    weather = (weather or "").strip().lower()
+    code = 0
+    for cond, marker in _CONDITION_MARKERS.items():
+        if marker in weather:
+            code |= CONDITION_BITS[cond]
+    return code
+
+
+class ForecastTable:
+    """Columnar view of one forecast payload: one array slot per day.
+
+    Day windows follow handle_weather: start=1 skips today, n=None runs to
+    the end of the forecast.
+    """
+
+    __slots__ = ("place", "days", "weather", "tmin", "tmax", "codes", "_index")
+
+    def __init__(self, data: dict):
+        items = data.get("forecast") or []
+        self.place = data.get("place", "")
+        self.days = [(it.get("day") or "").strip() for it in items]
+        self.weather = [(it.get("weather") or "").strip() for it in items]
+        self.tmin = np.array([it["temperature"]["min"] for it in items], dtype=np.float32)
+        self.tmax = np.array([it["temperature"]["max"] for it in items], dtype=np.float32)
+        self.codes = np.array([condition_code(w) for w in self.weather], dtype=np.uint8)
+        self._index = {}
+        for i, day in enumerate(self.days):
+            self._index.setdefault(day.lower(), i)
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def index_of(self, day: str) -> int | None:
+        return self._index.get(day.strip().lower())
+
+    def window(self, start: int = 0, n: int | None = None) -> slice:
+        stop = len(self) if n is None else min(len(self), start + n)
+        return slice(min(start, len(self)), stop)
+
+    def has(self, cond: str, start: int = 0, n: int | None = None) -> np.ndarray:
+        """Boolean mask over the window: does each day have cond?"""
+        return (self.codes[self.window(start, n)] & CONDITION_BITS[cond]) != 0
+
+    def days_with(self, cond: str, start: int = 0, n: int | None = None) -> list[str]:
+        w = self.window(start, n)
+        return [self.days[w.start + i] for i in np.flatnonzero(self.has(cond, start, n))]
+
+    def warmest(self, start: int = 0, n: int | None = None) -> int | None:
+        w = self.window(start, n)
+        return w.start + int(np.argmax(self.tmax[w])) if w.stop > w.start else None
+
+    def coldest(self, start: int = 0, n: int | None = None) -> int | None:
+        w = self.window(start, n)
+        return w.start + int(np.argmin(self.tmin[w])) if w.stop > w.start else None
+
+    def span(self, start: int = 0, n: int | None = None) -> tuple[float, float] | None:
+        w = self.window(start, n)
+        if w.stop <= w.start:
+            return None
+        return float(self.tmin[w].min()), float(self.tmax[w].max())
+
+
+class ForecastGrid:
+    """Several cities' tables stacked into (city, day) arrays for cross-city queries.
+
+    Shorter forecasts are padded with NaN temperatures and a zero condition code.
+    """
+
+    def __init__(self, tables: list[ForecastTable]):
+        self.tables = tables
+        self.places = [t.place for t in tables]
+        width = max((len(t) for t in tables), default=0)
+        self.tmin = np.full((len(tables), width), np.nan, dtype=np.float32)
+        self.tmax = np.full((len(tables), width), np.nan, dtype=np.float32)
+        self.codes = np.zeros((len(tables), width), dtype=np.uint8)
+        for row, t in enumerate(tables):
+            self.tmin[row, :len(t)] = t.tmin
+            self.tmax[row, :len(t)] = t.tmax
+            self.codes[row, :len(t)] = t.codes
+
+    def _cols(self, start: int, n: int | None) -> slice:
+        width = self.tmax.shape[1]
+        return slice(min(start, width), width if n is None else min(width, start + n))
+
+    def warmest(self, start: int = 0, n: int | None = None) -> tuple[int, int] | None:
+        """(city row, day index) of the highest maximum in the window."""
+        cols = self._cols(start, n)
+        block = self.tmax[:, cols]
+        if block.size == 0 or np.isnan(block).all():
+            return None
+        row, col = np.unravel_index(np.nanargmax(block), block.shape)
+        return int(row), cols.start + int(col)
+
+    def coldest(self, start: int = 0, n: int | None = None) -> tuple[int, int] | None:
+        cols = self._cols(start, n)
+        block = self.tmin[:, cols]
+        if block.size == 0 or np.isnan(block).all():
+            return None
+        row, col = np.unravel_index(np.nanargmin(block), block.shape)
+        return int(row), cols.start + int(col)
+
+    def has(self, cond: str, start: int = 0, n: int | None = None) -> np.ndarray:
+        """(city, day) mask of days with cond in the window."""
+        return (self.codes[:, self._cols(start, n)] & CONDITION_BITS[cond]) != 0
+
+    def spans(self, start: int = 0, n: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """Per-city lowest minimum and highest maximum over the window."""
+        cols = self._cols(start, n)
+        with warnings.catch_warnings():
+            # A city whose forecast ends before the window gives NaN, not an error.
+            warnings.simplefilter("ignore", RuntimeWarning)
+            return np.nanmin(self.tmin[:, cols], axis=1), np.nanmax(self.tmax[:, cols], axis=1)
+
+
+_tables = OrderedDict()
+_tables_lock = threading.Lock()
+_TABLES_MAX = 128
+
+
+def table_for(data: dict) -> ForecastTable:
+    """The table for a payload, built once per payload object.
+
+    Cached payloads are shared, so this is keyed by identity; holding the
+    payload in the entry keeps its id from being reused while cached.
+    """
+    key = id(data)
+    entry = _tables.get(key)
+    if entry is not None and entry[0] is data:
+        return entry[1]
+
+    table = ForecastTable(data)
+    with _tables_lock:
+        _tables[key] = (data, table)
+        # Oldest first; cache entries are replaced on refresh, so old payloads age out.
+        while len(_tables) > _TABLES_MAX:
+            _tables.popitem(last=False)
+    return table
@@ -1,4 +1,19 @@
 MODEL_PATH = "models/vosk-model-en-us-0.22"
+TTS_CACHE_DIR = "cache/tts"
+
+FORECAST_TTL_SECONDS = 600
+FORECAST_CACHE_SIZE = 64
+FORECAST_CACHE_PATH = "cache/forecast.json"
+PREFETCH_WORKERS = 2
+PREFETCH_MAX_PENDING = 8
+
+CALENDAR_STALE_SECONDS = 30
+
+SESSION_IDLE_SECONDS = 1800
+SESSION_MAX = 1000
+
+# Saying or typing one of these ends a conversation in chat mode.
+STOP_WORDS = ["stop", "bye", "goodbye", "quit", "exit"]
 
 DAYS = [
     "monday",
@@ -10,9 +25,6 @@ DAYS = [
     "sunday",
 ]
 
-context = {
-    "last_place": None,
-    "last_day": None,
-    "last_intent": None,
-    "last_created_event_id": None,
-}
+# Vocabulary seen at runtime, used to build the live ASR grammar.
+known_places = {"marburg", "frankfurt", "hamburg", "munich", "berlin", "cologne"}
+known_titles = set()
@@ -0,0 +1,427 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from utils.nimbus_state import DAYS
+from utils.tracing import traced
+
+CALENDAR_KEYWORDS = [
+    "calendar",
+    "appointment",
+    "meeting",
+    "schedule",
+    "event",
+    "add",
+    "create",
+    "delete",
+    "remove",
+    "update",
+    "change",
+    "where is my next",
+    "next appointment",
+    "next meeting",
+    "next event",
+]
+
+WEATHER_KEYWORDS = [
+    "weather",
+    "forecast",
+    "temperature",
+    "rain",
+    "snow",
+    "cloud",
+    "mist",
+    "thunderstorm",
+    "sunny",
+    "clear",
+    "warmest",
+    "hottest",
+    "coldest",
+]
+
+WEATHER_CONTEXT_WORDS = ["today", "tomorrow", "there"] + DAYS
+
+NEXT_QUERY_PHRASES = [
+    "where is my next appointment",
+    "where is my next meeting",
+    "where is my next event",
+    "next appointment",
+    "next meeting",
+    "next event",
+]
+DELETE_WORDS = ["delete", "remove"]
+PREVIOUS_WORDS = ["previous", "previously created", "last", "that appointment"]
+UPDATE_PREVIOUS_WORDS = ["previous", "previously created", "last"]
+TITLE_MARKERS = ["titled", "called", "named"]
+ADD_WORDS = ["add", "create", "schedule"]
+ITEM_WORDS = ["appointment", "meeting", "event"]
+CHANGE_WORDS = ["change", "update"]
+PLACE_WORDS = ["place", "location"]
+CONDITION_PHRASES = ["will it snow", "will it rain", "cloud", "clear", "mist", "fog", "thunder", "storm"]
+
+WORD_NUM = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12
+}
+
+
+class KeywordMatcher:
+    """Reports every keyword that occurs as a substring, in one regex pass.
+
+    A zero-width lookahead tries the alternation (longest first) at every
+    position, so overlapping keywords are all seen. Shorter keywords that
+    start at the same position are prefixes of the longest match there and
+    are added from a precomputed table.
+    """
+
+    def __init__(self, keywords):
+        kws = set(keywords)
+        self._re = re.compile("(?=(" + self._trie_pattern(kws) + "))")
+        self._implied = {kw: frozenset(k for k in kws if kw.startswith(k)) for kw in kws}
+
+    @staticmethod
+    def _trie_pattern(keywords) -> str:
+        # Factor shared prefixes so the engine rejects most positions on the
+        # first character; greedy optional tails make the longest keyword win.
+        trie = {}
+        for kw in keywords:
+            node = trie
+            for ch in kw:
+                node = node.setdefault(ch, {})
+            node[""] = {}
+
+        def build(node) -> str:
+            alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+            if not alts:
+                return ""
+            body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+            return "(?:" + body + ")?" if "" in node else body
+
+        return build(trie)
+
+    def scan(self, text: str) -> frozenset[str]:
+        found = set()
+        for m in self._re.finditer(text):
+            found |= self._implied[m.group(1)]
+        return frozenset(found)
+
+
+_MATCHER = KeywordMatcher(
+    CALENDAR_KEYWORDS + WEATHER_KEYWORDS + WEATHER_CONTEXT_WORDS + NEXT_QUERY_PHRASES
+    + DELETE_WORDS + PREVIOUS_WORDS + TITLE_MARKERS + ADD_WORDS + ITEM_WORDS
+    + CHANGE_WORDS + PLACE_WORDS + CONDITION_PHRASES
+)
+
+_TOKEN_RE = re.compile(r"\w+")
+_NEXT_N_DIGITS_RE = re.compile(r"\bnext\s+(\d+)\s+days\b")
+_NEXT_N_WORDS_RE = re.compile(r"\bnext\s+(one|two|three|four|five|six|seven)\s+days\b")
+_PLACE_IN_RE = re.compile(r"\bin\s+([a-zA-ZÄÖÜäöüß\-]+)\b")
+_PLACE_WEATHER_RE = re.compile(r"\bweather\s+([a-zA-ZÄÖÜäöüß\-]+)\b", flags=re.IGNORECASE)
+_PLACE_LIST_RE = re.compile(
+    r"\bin\s+([a-zA-ZÄÖÜäöüß\-]+(?:\s*,\s*[a-zA-ZÄÖÜäöüß\-]+)*\s*,?\s+and\s+[a-zA-ZÄÖÜäöüß\-]+)",
+    flags=re.IGNORECASE,
+)
+_PLACE_LIST_SEP_RE = re.compile(r"\s*,\s*(?:and\s+)?|\s+and\s+", flags=re.IGNORECASE)
+_NOT_PLACES = set(WEATHER_CONTEXT_WORDS) | {"will", "what", "how", "is", "it", "the", "also"}
+_PLACE_CAPS_RE = re.compile(r"\b[A-Z][a-zA-ZÄÖÜäöüß\-]{2,}\b")
+_DELETE_ITEM_RE = re.compile(r"\b(delete|remove)\s+(appointment|meeting|event)\s+\w+")
+_DELETE_TITLE_MARKED_RE = re.compile(r"\b(titled|called|named)\s+(.+)$", flags=re.IGNORECASE)
+_DELETE_TITLE_ITEM_RE = re.compile(r"\b(delete|remove)\s+(appointment|meeting|event)\s+(.+)$", flags=re.IGNORECASE)
+_ADD_TITLE_RE = re.compile(
+    r"\b(titled|called)\s+(.+?)(?:\s+for|\s+on|\s+at|\s+tomorrow|\s+today|$)",
+    flags=re.IGNORECASE,
+)
+_LOCATION_RE = re.compile(r"\b(to|in)\s+(.+)$", flags=re.IGNORECASE)
+_TRAILING_PUNCT_RE = re.compile(r"[.?!]$")
+_PM_RE = re.compile(r"\b(p)\s*(m)\b")
+_AM_RE = re.compile(r"\b(a)\s*(m)\b")
+_TIME_DIGITS_RE = re.compile(r"\b(\d{1,2})(?::(\d{2}))?\s*(am|pm)\b")
+_TIME_WORDS_RE = re.compile(
+    r"\b(one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve)(?::(\d{2}))?\s*(am|pm)\b"
+)
+
+
+class Scan:
+    __slots__ = ("text", "lower", "hits", "tokens")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.lower = text.lower()
+        self.hits = _MATCHER.scan(self.lower)
+        self.tokens = frozenset(_TOKEN_RE.findall(self.lower))
+
+    def has_any(self, words) -> bool:
+        return not self.hits.isdisjoint(words)
+
+
+@lru_cache(maxsize=256)
+def scan(text: str) -> Scan:
+    # Handlers ask several questions about the same utterance; they all share one scan.
+    return Scan(text)
+
+
+@dataclass
+class Frame:
+    text: str
+    intent: str
+    action: str | None = None
+    slots: dict = field(default_factory=dict)
+
+
+def intent_of(s: Scan) -> str:
+    if s.has_any(CALENDAR_KEYWORDS):
+        return "calendar"
+    if s.has_any(WEATHER_KEYWORDS):
+        return "weather"
+    if next_n_days_of(s) is not None:
+        return "weather"
+    if s.has_any(WEATHER_CONTEXT_WORDS):
+        return "weather"
+    return "unknown"
+
+
+def is_next_query(s: Scan) -> bool:
+    return s.has_any(NEXT_QUERY_PHRASES)
+
+
+def is_delete_previous(s: Scan) -> bool:
+    return s.has_any(DELETE_WORDS) and s.has_any(PREVIOUS_WORDS)
+
+
+def is_delete_by_title(s: Scan) -> bool:
+    if not s.has_any(DELETE_WORDS):
+        return False
+    return s.has_any(TITLE_MARKERS) or bool(_DELETE_ITEM_RE.search(s.lower))
+
+
+def is_update_place(s: Scan) -> bool:
+    return s.has_any(CHANGE_WORDS) and s.has_any(PLACE_WORDS)
+
+
+def is_add(s: Scan) -> bool:
+    return s.has_any(ADD_WORDS) and s.has_any(ITEM_WORDS)
+
+
+# Specific commands win over general ones, e.g. "delete the previous meeting"
+# is never treated as delete-by-title.
+CALENDAR_ACTIONS = [
+    ("next_query", is_next_query),
+    ("delete_previous", is_delete_previous),
+    ("delete_by_title", is_delete_by_title),
+    ("update_place", is_update_place),
+    ("add", is_add),
+]
+
+
+def calendar_action_of(s: Scan) -> str | None:
+    for action, test in CALENDAR_ACTIONS:
+        if test(s):
+            return action
+    return None
+
+
+def refers_back_of(s: Scan) -> bool:
+    return "there" in s.tokens
+
+
+def place_of(s: Scan) -> str | None:
+    # "for the next three days in Munich": skip "in the", take "in Munich".
+    for m in _PLACE_IN_RE.finditer(s.text):
+        if m.group(1).lower() not in _NOT_PLACES:
+            return m.group(1)
+
+    m = _PLACE_WEATHER_RE.search(s.text)
+    if m:
+        return m.group(1)
+
+    # last capitalised word often is a place name (Frankfurt, Marburg, ...)
+    caps = _PLACE_CAPS_RE.findall(s.text)
+    if caps:
+        return caps[-1]
+
+    return None
+
+
+def places_of(s: Scan) -> list[str]:
+    """Every city in a list such as "in Berlin, Hamburg and Munich"; [] for a single place."""
+    if " and " not in s.lower and "," not in s.lower:
+        return []
+    m = _PLACE_LIST_RE.search(s.text)
+    if not m:
+        return []
+    places = [p for p in _PLACE_LIST_SEP_RE.split(m.group(1)) if p and p.lower() not in _NOT_PLACES]
+    return places if len(places) > 1 else []
+
+
+_WARMEST_WORDS = frozenset(["warmest", "hottest"])
+
+
+def extreme_of(s: Scan) -> str | None:
+    if s.has_any(_WARMEST_WORDS):
+        return "warmest"
+    if "coldest" in s.hits:
+        return "coldest"
+    return None
+
+
+def day_of(s: Scan) -> str | None:
+    if "today" in s.tokens:
+        return "today"
+    if "tomorrow" in s.tokens:
+        return "tomorrow"
+    return weekday_of(s)
+
+
+def weekday_of(s: Scan) -> str | None:
+    for d in DAYS:
+        if d in s.tokens:
+            return d
+    return None
+
+
+def next_n_days_of(s: Scan) -> int | None:
+    if "days" not in s.tokens:
+        return None
+
+    m = _NEXT_N_DIGITS_RE.search(s.lower)
+    if m:
+        n = int(m.group(1))
+        return max(1, min(n, 7))
+
+    m = _NEXT_N_WORDS_RE.search(s.lower)
+    if m:
+        return WORD_NUM[m.group(1)]
+
+    return None
+
+
+def condition_of(s: Scan) -> str | None:
+    if "will it snow" in s.hits or "snow" in s.tokens:
+        return "snow"
+    if "will it rain" in s.hits or "rain" in s.tokens:
+        return "rain"
+    if "cloud" in s.hits:
+        return "clouds"
+    if "clear" in s.hits:
+        return "clear sky"
+    if s.has_any(["mist", "fog"]):
+        return "mist"
+    if s.has_any(["thunder", "storm"]):
+        return "thunderstorm"
+    return None
+
+
+def target_day_of(s: Scan) -> str | None:
+    if "tomorrow" in s.hits:
+        return "tomorrow"
+    if "today" in s.hits:
+        return "today"
+    return weekday_of(s)
+
+
+def add_title_of(s: Scan) -> str | None:
+    m = _ADD_TITLE_RE.search(s.text)
+    if m:
+        return m.group(2).strip()
+    return None
+
+
+def delete_title_of(s: Scan) -> str | None:
+    t = s.text.strip()
+
+    m = _DELETE_TITLE_MARKED_RE.search(t)
+    if m:
+        title = _TRAILING_PUNCT_RE.sub("", m.group(2).strip()).strip()
+        return title or None
+
+    m = _DELETE_TITLE_ITEM_RE.search(t)
+    if m:
+        title = _TRAILING_PUNCT_RE.sub("", m.group(3).strip()).strip()
+        return title or None
+
+    return None
+
+
+def location_of(s: Scan) -> str | None:
+    m = _LOCATION_RE.search(s.text)
+    if m:
+        loc = m.group(2).strip()
+        loc = _TRAILING_PUNCT_RE.sub("", loc).strip()
+        return loc
+    return None
+
+
+def time_of(s: Scan):
+    t = s.lower.replace(".", "")
+    t = _PM_RE.sub("pm", t)
+    t = _AM_RE.sub("am", t)
+
+    m = _TIME_DIGITS_RE.search(t)
+    if m:
+        hour = int(m.group(1)) % 12
+        minute = int(m.group(2) or 0)
+        if m.group(3) == "pm":
+            hour += 12
+        return hour, minute
+
+    m = _TIME_WORDS_RE.search(t)
+    if m:
+        hour = WORD_NUM[m.group(1)] % 12
+        minute = int(m.group(2) or 0)
+        if m.group(3) == "pm":
+            hour += 12
+        return hour, minute
+
+    return None
+
+
+def weather_slots(s: Scan) -> dict:
+    return {
+        "place": place_of(s),
+        "places": places_of(s),
+        "refers_back": refers_back_of(s),
+        "day": day_of(s),
+        "next_n_days": next_n_days_of(s),
+        "condition": condition_of(s),
+        "extreme": extreme_of(s),
+    }
+
+
+def calendar_slots(s: Scan, action: str | None) -> dict:
+    if action == "delete_by_title":
+        return {"title": delete_title_of(s)}
+    if action == "update_place":
+        return {
+            "location": location_of(s),
+            "refers_previous": s.has_any(UPDATE_PREVIOUS_WORDS),
+            "target_day": target_day_of(s),
+        }
+    if action == "add":
+        day = None
+        if "tomorrow" in s.hits:
+            day = "tomorrow"
+        elif "today" in s.hits:
+            day = "today"
+        return {"title": add_title_of(s), "day": day, "time": time_of(s)}
+    return {}
+
+
+@traced("nlu")
+def parse(text: str, intent: str | None = None) -> Frame:
+    """Single-pass NLU: intent, calendar sub-action and the slots that action needs.
+
+    Passing intent skips detection and fills the slots for that domain, which
+    is what the handlers do once main() has already routed the utterance.
+    """
+    s = scan(text)
+    frame = Frame(text=text, intent=intent or intent_of(s))
+
+    if frame.intent == "weather":
+        frame.slots = weather_slots(s)
+    elif frame.intent == "calendar":
+        frame.action = calendar_action_of(s)
+        frame.slots = calendar_slots(s, frame.action)
+
+    return frame
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from utils.nimbus_state import SESSION_IDLE_SECONDS, SESSION_MAX
+
+
+@dataclass
+class Session:
+    """Conversational state of one user, passed to the handlers each turn."""
+
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    last_place: str | None = None
+    last_day: str | None = None
+    last_intent: str | None = None
+    last_created_event_id: int | None = None
+    last_seen: float = field(default_factory=time.time)
+    # Turns of one session are answered in order, even if they arrive concurrently.
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def touch(self):
+        self.last_seen = time.time()
+
+
+class SessionStore:
+    """Live sessions, least recently used first.
+
+    Sessions idle for longer than idle_seconds are dropped lazily whenever the
+    store is accessed; past max_sessions the least recently used one goes.
+    """
+
+    def __init__(self, idle_seconds: float = SESSION_IDLE_SECONDS, max_sessions: int = SESSION_MAX):
+        self.idle_seconds = idle_seconds
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def _evict(self, now: float):
+        # Sessions are kept in last-seen order, so only the stale head is visited.
+        while self._sessions:
+            sid, session = next(iter(self._sessions.items()))
+            if now - session.last_seen < self.idle_seconds and len(self._sessions) <= self.max_sessions:
+                break
+            del self._sessions[sid]
+            self.evicted += 1
+
+    def create(self) -> Session:
+        session = Session()
+        with self._lock:
+            self._sessions[session.id] = session
+            self._evict(session.last_seen)
+        return session
+
+    def get(self, session_id: str) -> Session | None:
+        now = time.time()
+        with self._lock:
+            self._evict(now)
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.touch()
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def close(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def evict_idle(self) -> int:
+        with self._lock:
+            before = self.evicted
+            self._evict(time.time())
+            return self.evicted - before
+
+
+# The single session used by the interactive console (main.py).
+default_session = Session(id="local")
@@ -1,39 +1,266 @@
 import os
 import sys
+import json
+import hashlib
+import argparse
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import unquote, urlsplit
+
 import requests
 from tqdm import tqdm
-import zipfile
 
-MODEL_URL = "https://alphacephei.com/vosk/models/vosk-model-en-us-0.22.zip"
+# NIMBUS_MODEL_URL may point at a mirror, an http:// stand-in or a file:// path.
+MODEL_URL = os.environ.get("NIMBUS_MODEL_URL", "https://alphacephei.com/vosk/models/vosk-model-en-us-0.22.zip")
+# Expected SHA-256 of the zip; without it the digest is printed so it can be pinned.
+MODEL_SHA256 = os.environ.get("NIMBUS_MODEL_SHA256")
 MODEL_DIR = "models/vosk-model-en-us-0.22"
 ZIP_PATH = "models/vosk-model-en-us-0.22.zip"
 
+CHUNK_BYTES = 16 * 1024 * 1024
+READ_BYTES = 1024 * 1024
+DOWNLOAD_WORKERS = 4
+
+# Files Vosk cannot start without; the decoding graph is checked separately.
+REQUIRED_FILES = ["am/final.mdl", "conf/mfcc.conf", "conf/model.conf"]
+# Optional parts of the big model (RNNLM and large-LM rescoring) skipped by --lean.
+OPTIONAL_DIRS = ["rnnlm/", "rescore/"]
+
 def ensure_dir(path):
     if not os.path.exists(path):
         os.makedirs(path)
 
-def download_model():
-    ensure_dir("models")
-    print(f" Model not found at '{MODEL_DIR}'.")
-    print("Downloading Vosk model (1.8 GB)... this may take a while depending on your internet speed.\n")
+def _file_path(url: str) -> str | None:
+    parts = urlsplit(url)
+    if parts.scheme == "file":
+        return unquote(parts.path)
+    if not parts.scheme:
+        return url
+    return None
+
+def _probe(url: str) -> tuple[int | None, bool]:
+    """Return (size, supports ranged reads) for the download source."""
+    path = _file_path(url)
+    if path is not None:
+        return os.path.getsize(path), True
+
+    r = requests.head(url, allow_redirects=True, timeout=30)
+    r.raise_for_status()
+    size = r.headers.get("content-length")
+    ranged = r.headers.get("accept-ranges", "").lower() == "bytes"
+    return (int(size) if size else None), ranged
+
+def _read_range(url: str, start: int, end: int, session=None):
+    """Yield the bytes in [start, end] (inclusive) in READ_BYTES blocks."""
+    path = _file_path(url)
+    if path is not None:
+        with open(path, "rb") as src:
+            src.seek(start)
+            left = end - start + 1
+            while left > 0:
+                block = src.read(min(READ_BYTES, left))
+                if not block:
+                    raise IOError(f"{path} ended early at byte {end - left + 1}")
+                left -= len(block)
+                yield block
+        return
+
+    with (session or requests).get(url, headers={"Range": f"bytes={start}-{end}"}, stream=True, timeout=60) as r:
+        r.raise_for_status()
+        if r.status_code != 206:
+            raise IOError("Server ignored the Range header.")
+        for block in r.iter_content(chunk_size=READ_BYTES):
+            yield block
+
+def _load_state(path: str, url: str, size: int) -> set[int]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return set()
+    if state.get("url") != url or state.get("size") != size:
+        return set()
+    return set(state.get("done", []))
+
+def _save_state(path: str, url: str, size: int, done: set[int]):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"url": url, "size": size, "done": sorted(done)}, f)
+    os.replace(tmp, path)
+
+class _OrderedHasher:
+    """SHA-256 over a file whose chunks finish out of order.
+
+    Each finished chunk is hashed as soon as every chunk before it is done,
+    while it is still in the page cache, so no second pass over the file is needed.
+    """
+
+    def __init__(self, path: str, size: int, chunk_bytes: int):
+        self.path = path
+        self.size = size
+        self.chunk_bytes = chunk_bytes
+        self.sha = hashlib.sha256()
+        self.next_chunk = 0
+        self._done = set()
+        self._lock = threading.Lock()
+
+    def chunk_done(self, index: int):
+        with self._lock:
+            self._done.add(index)
+            with open(self.path, "rb") as f:
+                while self.next_chunk in self._done:
+                    f.seek(self.next_chunk * self.chunk_bytes)
+                    left = min(self.chunk_bytes, self.size - self.next_chunk * self.chunk_bytes)
+                    while left > 0:
+                        block = f.read(min(READ_BYTES, left))
+                        self.sha.update(block)
+                        left -= len(block)
+                    self._done.discard(self.next_chunk)
+                    self.next_chunk += 1
+
+    def hexdigest(self) -> str:
+        return self.sha.hexdigest()
+
+def _download_ranged(url: str, part: str, size: int, workers: int) -> str:
+    state_path = part + ".json"
+    chunks = (size + CHUNK_BYTES - 1) // CHUNK_BYTES
+    done = _load_state(state_path, url, size) if os.path.exists(part) else set()
+
+    if not os.path.exists(part) or os.path.getsize(part) != size:
+        done = set()
+        with open(part, "wb") as f:
+            f.truncate(size)
 
-    with requests.get(MODEL_URL, stream=True) as r:
+    hasher = _OrderedHasher(part, size, CHUNK_BYTES)
+    if done:
+        print(f" Resuming download: {len(done)}/{chunks} chunks already on disk.")
+    for index in sorted(done):
+        hasher.chunk_done(index)
+
+    local = threading.local()
+    state_lock = threading.Lock()
+
+    def fetch(index: int, bar):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        start = index * CHUNK_BYTES
+        end = min(size, start + CHUNK_BYTES) - 1
+        with open(part, "r+b") as f:
+            f.seek(start)
+            for block in _read_range(url, start, end, local.session):
+                f.write(block)
+                bar.update(len(block))
+        with state_lock:
+            done.add(index)
+            _save_state(state_path, url, size, done)
+        hasher.chunk_done(index)
+
+    todo = [i for i in range(chunks) if i not in done]
+    already = sum(min(CHUNK_BYTES, size - i * CHUNK_BYTES) for i in done)
+    with tqdm(total=size, initial=already, unit="B", unit_scale=True, desc="Downloading") as bar:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for fut in as_completed([pool.submit(fetch, i, bar) for i in todo]):
+                fut.result()
+
+    os.remove(state_path)
+    return hasher.hexdigest()
+
+def _download_stream(url: str, part: str) -> str:
+    # Fallback for sources without ranged reads: one stream, restarted from zero.
+    sha = hashlib.sha256()
+    with requests.get(url, stream=True, timeout=60) as r:
         r.raise_for_status()
         total = int(r.headers.get("content-length", 0))
-        with open(ZIP_PATH, "wb") as f, tqdm(
-            total=total, unit="B", unit_scale=True, desc="Downloading"
-        ) as bar:
-            for chunk in r.iter_content(chunk_size=8192):
-                f.write(chunk)
-                bar.update(len(chunk))
+        with open(part, "wb") as f, tqdm(total=total, unit="B", unit_scale=True, desc="Downloading") as bar:
+            for block in r.iter_content(chunk_size=READ_BYTES):
+                f.write(block)
+                sha.update(block)
+                bar.update(len(block))
+    return sha.hexdigest()
+
+def download_model(url: str = MODEL_URL, expected_sha256: str | None = MODEL_SHA256, workers: int = DOWNLOAD_WORKERS):
+    ensure_dir(os.path.dirname(ZIP_PATH) or ".")
+    print(f" Model not found at '{MODEL_DIR}'.")
+    print("Downloading Vosk model (1.8 GB)... this may take a while depending on your internet speed.\n")
+
+    part = ZIP_PATH + ".part"
+    try:
+        size, ranged = _probe(url)
+    except requests.RequestException:
+        size, ranged = None, False
+    if size and ranged:
+        digest = _download_ranged(url, part, size, workers)
+    else:
+        digest = _download_stream(url, part)
+
+    if expected_sha256 and digest.lower() != expected_sha256.lower():
+        os.remove(part)
+        raise IOError(f"Checksum mismatch for {url}: expected {expected_sha256}, got {digest}")
+    if not expected_sha256:
+        print(f" SHA-256: {digest} (set NIMBUS_MODEL_SHA256 to verify future downloads)")
+
+    os.replace(part, ZIP_PATH)
     print("\n Download complete.")
 
-def extract_model():
+def _zip_ok(path: str, expected_sha256: str | None) -> bool:
+    """Whether a zip left by an earlier run is complete and intact."""
+    if expected_sha256:
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(READ_BYTES), b""):
+                sha.update(block)
+        return sha.hexdigest().lower() == expected_sha256.lower()
+    try:
+        with zipfile.ZipFile(path, "r") as zf:
+            return zf.testzip() is None
+    except (zipfile.BadZipFile, OSError):
+        return False
+
+def _members(zf: zipfile.ZipFile, lean: bool) -> list[zipfile.ZipInfo]:
+    members = []
+    for info in zf.infolist():
+        # Paths inside the zip start with the model folder name.
+        inner = info.filename.split("/", 1)[1] if "/" in info.filename else ""
+        if lean and any(inner.startswith(d) for d in OPTIONAL_DIRS):
+            continue
+        members.append(info)
+    return members
+
+def extract_model(lean: bool = False, workers: int | None = None, keep_zip: bool = False):
     print(" Extracting model files...")
-    with zipfile.ZipFile(ZIP_PATH, "r") as zip_ref:
-        zip_ref.extractall("models")
+    dest = os.path.dirname(MODEL_DIR) or "."
+    with zipfile.ZipFile(ZIP_PATH, "r") as zf:
+        members = _members(zf, lean)
+    # ZipFile.extract creates missing parent folders without exist_ok, so two
+    # workers writing into the same new folder can collide; make them all first.
+    for info in members:
+        parts = [p for p in info.filename.replace("\\", "/").split("/") if p not in ("", ".", "..")]
+        folder = parts if info.is_dir() else parts[:-1]
+        if folder:
+            os.makedirs(os.path.join(dest, *folder), exist_ok=True)
+    members = [m for m in members if not m.is_dir()]
+    # Largest first so one big file does not finish last on its own.
+    members.sort(key=lambda m: m.file_size, reverse=True)
+
+    local = threading.local()
+
+    def extract(info: zipfile.ZipInfo):
+        # ZipFile handles are not safe to share between threads; one per worker.
+        if not hasattr(local, "zf"):
+            local.zf = zipfile.ZipFile(ZIP_PATH, "r")
+        local.zf.extract(info, dest)
+        return info.file_size
+
+    total = sum(m.file_size for m in members)
+    with tqdm(total=total, unit="B", unit_scale=True, desc="Extracting") as bar:
+        with ThreadPoolExecutor(max_workers=workers or min(8, os.cpu_count() or 1)) as pool:
+            for fut in as_completed([pool.submit(extract, m) for m in members]):
+                bar.update(fut.result())
     print(" Extraction complete.")
 
+    if keep_zip:
+        return
     try:
         os.remove(ZIP_PATH)
         print(" Clean-up done — deleted downloaded zip file.")
@@ -41,19 +268,42 @@ def extract_model():
         print(f" Could not delete zip file. You can manually delete it at '{ZIP_PATH}': {e}")
 
 def verify_model():
-    return os.path.exists(os.path.join(MODEL_DIR, "am", "final.mdl"))
+    for name in REQUIRED_FILES:
+        path = os.path.join(MODEL_DIR, name)
+        if not os.path.isfile(path) or os.path.getsize(path) == 0:
+            return False
+    graph = os.path.join(MODEL_DIR, "graph")
+    static = os.path.isfile(os.path.join(graph, "HCLG.fst"))
+    dynamic = os.path.isfile(os.path.join(graph, "HCLr.fst")) and os.path.isfile(os.path.join(graph, "Gr.fst"))
+    return static or dynamic
+
+def main(argv: list[str] | None = None):
+    ap = argparse.ArgumentParser(description="Download and unpack the Vosk model.")
+    ap.add_argument("--url", default=MODEL_URL, help="model zip (https://, http:// or file://)")
+    ap.add_argument("--sha256", default=MODEL_SHA256, help="expected SHA-256 of the zip")
+    ap.add_argument("-j", "--workers", type=int, default=DOWNLOAD_WORKERS, help="parallel range requests")
+    ap.add_argument("--lean", action="store_true", help="skip the optional rnnlm/ and rescore/ folders")
+    ap.add_argument("--keep-zip", action="store_true", help="keep the zip after extraction")
+    args = ap.parse_args([] if argv is None else argv)
 
-def main():
     print(" Checking for Vosk model...")
     if verify_model():
         print(f"Model found at '{MODEL_DIR}'.")
         return
 
-    download_model()
-    extract_model()
+    if os.path.exists(ZIP_PATH) and not _zip_ok(ZIP_PATH, args.sha256):
+        # Truncated by an interrupted download or corrupted; fetch it again.
+        print(f" '{ZIP_PATH}' is incomplete or corrupt; downloading it again.")
+        os.remove(ZIP_PATH)
+    if not os.path.exists(ZIP_PATH):
+        download_model(args.url, args.sha256, args.workers)
+    extract_model(lean=args.lean, keep_zip=args.keep_zip)
 
     if verify_model():
         print(f"\n Model setup successful! Ready to use at '{MODEL_DIR}'.")
     else:
         print("\n Something went wrong: model verification failed.")
         sys.exit(1)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
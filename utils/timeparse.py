@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from datetime import datetime
+from functools import lru_cache
+
+try:
+    from dateutil import parser as dateparser
+except Exception:
+    dateparser = None
+
+
+@lru_cache(maxsize=4096)
+def parse_timestamp(s: str) -> datetime | None:
+    """Parse an API timestamp, memoized by the raw string.
+
+    The calendar API returns "%Y-%m-%dT%H:%M", which is sliced directly.
+    Other ISO forms go through fromisoformat and anything else through dateutil.
+    """
+    if len(s) == 16 and s[4] == "-" and s[7] == "-" and s[10] in "T " and s[13] == ":":
+        try:
+            return datetime(int(s[0:4]), int(s[5:7]), int(s[8:10]), int(s[11:13]), int(s[14:16]))
+        except ValueError:
+            pass
+
+    try:
+        return datetime.fromisoformat(s)
+    except ValueError:
+        pass
+
+    if dateparser is None:
+        return None
+    try:
+        return dateparser.parse(s)
+    except Exception:
+        return None
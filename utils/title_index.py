@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import bisect
+from collections import defaultdict
+
+PREFIX_SCORE = 0.9
+MIN_TOKEN_SCORE = 0.7
+MIN_SCORE = 0.75
+
+
+def edit_distance(a: str, b: str, limit: int | None = None) -> int:
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        if limit is not None and min(cur) > limit:
+            return limit + 1
+        prev = cur
+    return prev[-1]
+
+
+def _grams(token: str) -> set[str]:
+    padded = f"${token}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TitleIndex:
+    """Token-level inverted index over normalized event titles.
+
+    Query tokens are matched exactly, as a prefix (sorted vocabulary +
+    bisect) or fuzzily (character trigrams narrow the vocabulary, edit
+    distance ranks it), so "team meting" still finds "team meeting".
+    """
+
+    def __init__(self):
+        self._titles = {}
+        self._postings = defaultdict(set)
+        self._vocab = []
+        self._grams = defaultdict(set)
+
+    def add(self, key: str, title: str):
+        self.remove(key)
+        if not title:
+            return
+        self._titles[key] = title
+        for tok in set(title.split()):
+            if not self._postings[tok]:
+                bisect.insort(self._vocab, tok)
+                for g in _grams(tok):
+                    self._grams[g].add(tok)
+            self._postings[tok].add(key)
+
+    def remove(self, key: str):
+        title = self._titles.pop(key, None)
+        if title is None:
+            return
+        for tok in set(title.split()):
+            keys = self._postings.get(tok)
+            if keys is None:
+                continue
+            keys.discard(key)
+            if not keys:
+                del self._postings[tok]
+                i = bisect.bisect_left(self._vocab, tok)
+                if i < len(self._vocab) and self._vocab[i] == tok:
+                    del self._vocab[i]
+                for g in _grams(tok):
+                    self._grams[g].discard(tok)
+                    if not self._grams[g]:
+                        del self._grams[g]
+
+    def _token_matches(self, qtok: str) -> dict[str, float]:
+        matches = {}
+        if qtok in self._postings:
+            matches[qtok] = 1.0
+
+        i = bisect.bisect_left(self._vocab, qtok)
+        while i < len(self._vocab) and self._vocab[i].startswith(qtok):
+            matches.setdefault(self._vocab[i], PREFIX_SCORE)
+            i += 1
+
+        limit = max(1, len(qtok) // 4)
+        seen = set()
+        for g in _grams(qtok):
+            for tok in self._grams.get(g, ()):
+                if tok in seen or tok in matches:
+                    continue
+                seen.add(tok)
+                d = edit_distance(qtok, tok, limit)
+                if d <= limit:
+                    score = 1.0 - d / max(len(qtok), len(tok))
+                    if score >= MIN_TOKEN_SCORE:
+                        matches[tok] = score
+        return matches
+
+    def search(self, query: str, limit: int | None = None) -> list[tuple[float, str]]:
+        """Return (score, key) pairs, best first. Substring matches score 1.0."""
+        qtoks = query.split()
+        if not qtoks:
+            return []
+
+        per_token = [self._token_matches(q) for q in qtoks]
+        scores = defaultdict(float)
+        for matches in per_token:
+            best = {}
+            for tok, score in matches.items():
+                for key in self._postings[tok]:
+                    if score > best.get(key, 0.0):
+                        best[key] = score
+            for key, score in best.items():
+                scores[key] += score
+
+        ranked = []
+        for key, total in scores.items():
+            score = 1.0 if query in self._titles[key] else min(total / len(qtoks), PREFIX_SCORE)
+            if score >= MIN_SCORE:
+                ranked.append((score, key))
+        ranked.sort(key=lambda x: (-x[0], x[1]))
+        return ranked[:limit] if limit else ranked
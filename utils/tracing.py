@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+# When set, main() appends the traced turns to this JSONL file on quit.
+TRACE_PATH = os.environ.get("NIMBUS_TRACE_PATH")
+
+
+class Tracer:
+    """Per-turn stage timings kept in a ring buffer of recent turns.
+
+    main() opens a turn with begin_turn(); code anywhere in the pipeline wraps
+    its stage in ``with span("api.weather"):`` or ``@traced("nlu")``. The
+    current turn lives in a context variable, so it follows asyncio tasks and
+    asyncio.to_thread(); work handed to a plain thread (e.g. TTS playback)
+    passes the turn to span() explicitly, and attach() resumes a turn that
+    was begun in another task.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self._turns = deque(maxlen=capacity)
+        self._current = ContextVar("nimbus_turn", default=None)
+        self._lock = threading.Lock()
+
+    def current_turn(self) -> dict | None:
+        return self._current.get()
+
+    def begin_turn(self, **attrs) -> dict:
+        turn = {"started": time.time(), "spans": [], **attrs}
+        turn["_t0"] = time.perf_counter()
+        self._current.set(turn)
+        return turn
+
+    def attach(self, turn: dict | None):
+        self._current.set(turn)
+
+    def end_turn(self):
+        turn = self.current_turn()
+        if turn is None:
+            return
+        self._current.set(None)
+        turn["total_ms"] = round((time.perf_counter() - turn.pop("_t0")) * 1000, 3)
+        with self._lock:
+            self._turns.append(turn)
+
+    @contextmanager
+    def span(self, name: str, turn: dict | None = None):
+        turn = turn if turn is not None else self.current_turn()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            if turn is not None:
+                ms = round((time.perf_counter() - t0) * 1000, 3)
+                with self._lock:
+                    turn["spans"].append({"name": name, "ms": ms})
+
+    def traced(self, name: str):
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if self.current_turn() is None:
+                    return fn(*args, **kwargs)
+                with self.span(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def recent(self, n: int | None = None) -> list[dict]:
+        with self._lock:
+            turns = list(self._turns)
+        return turns[-n:] if n else turns
+
+    def export_jsonl(self, path: str) -> int:
+        turns = self.recent()
+        with open(path, "a", encoding="utf-8") as f:
+            for turn in turns:
+                f.write(json.dumps(turn, ensure_ascii=False) + "\n")
+        return len(turns)
+
+    def summary(self) -> dict:
+        by_name = {}
+        for turn in self.recent():
+            by_name.setdefault("turn", []).append(turn["total_ms"])
+            totals = {}
+            for sp in turn["spans"]:
+                totals[sp["name"]] = totals.get(sp["name"], 0.0) + sp["ms"]
+            for name, ms in totals.items():
+                by_name.setdefault(name, []).append(ms)
+
+        def pct(values, p):
+            return values[min(len(values) - 1, int(p * len(values)))]
+
+        out = {}
+        for name, values in by_name.items():
+            values.sort()
+            out[name] = {
+                "count": len(values),
+                "p50_ms": pct(values, 0.50),
+                "p90_ms": pct(values, 0.90),
+                "p99_ms": pct(values, 0.99),
+                "max_ms": values[-1],
+            }
+        return out
+
+    def format_summary(self) -> str:
+        stats = self.summary()
+        if not stats:
+            return "No turns traced yet."
+        lines = [f"{'stage':<16}{'count':>7}{'p50 ms':>11}{'p90 ms':>11}{'p99 ms':>11}{'max ms':>11}"]
+        for name in sorted(stats, key=lambda n: (n == "turn", n)):
+            s = stats[name]
+            lines.append(
+                f"{name:<16}{s['count']:>7}{s['p50_ms']:>11.1f}{s['p90_ms']:>11.1f}{s['p99_ms']:>11.1f}{s['max_ms']:>11.1f}"
+            )
+        return "\n".join(lines)
+
+
+tracer = Tracer()
+span = tracer.span
+traced = tracer.traced
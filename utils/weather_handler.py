@@ -1,67 +1,67 @@
 from __future__ import annotations
 
-import re
-
+from api.forecast_cache import ForecastCache, Prefetcher
 from api.weather import get_forecast
-from utils.nimbus_state import DAYS, context
-
-
-def extract_place(text: str) -> str | None:
-    t = text.lower()
-
-    if re.search(r"\bthere\b", t):
-        return context.get("last_place")
-
-    m = re.search(r"\bin\s+([a-zA-ZÄÖÜäöüß\-]+)\b", text)
-    if m:
-        return m.group(1)
-
-    m = re.search(r"\bweather\s+([a-zA-ZÄÖÜäöüß\-]+)\b", text, flags=re.IGNORECASE)
-    if m:
-        return m.group(1)
-
-    # last capitalised word often is a place name (Frankfurt, Marburg, ...)
-    caps = re.findall(r"\b[A-Z][a-zA-ZÄÖÜäöüß\-]{2,}\b", text)
-    if caps:
-        return caps[-1]
-
-    return None
+from utils.nimbus_state import (
+    FORECAST_CACHE_PATH,
+    FORECAST_CACHE_SIZE,
+    FORECAST_TTL_SECONDS,
+    PREFETCH_MAX_PENDING,
+    PREFETCH_WORKERS,
+    known_places,
+)
+from utils.nlu import (
+    condition_of,
+    day_of,
+    next_n_days_of,
+    parse,
+    place_of,
+    refers_back_of,
+    scan,
+)
+from utils.session import Session, default_session
+from utils.forecast_table import CONDITION_BITS, ForecastGrid, ForecastTable, condition_code, table_for
+from utils.tracing import traced
+
+forecast_cache = ForecastCache(
+    get_forecast,
+    ttl=FORECAST_TTL_SECONDS,
+    max_entries=FORECAST_CACHE_SIZE,
+    path=FORECAST_CACHE_PATH,
+)
+prefetcher = Prefetcher(forecast_cache, max_workers=PREFETCH_WORKERS, max_pending=PREFETCH_MAX_PENDING)
+
+
+def prefetch_followups(session: Session):
+    # Follow-ups usually stay in the same place ("will it rain there").
+    prefetcher.prefetch(session.last_place)
+    # Other cities the user has asked about are warmed once per TTL, not per
+    # turn. Past half the cache size that would only evict entries in use.
+    if len(known_places) <= forecast_cache.max_entries // 2:
+        prefetcher.warm(known_places, every=forecast_cache.ttl)
+
+
+def prefetch_mentions(text: str):
+    # Called with ASR partials, so the lookup starts before the user stops talking.
+    padded = f" {text.lower()} "
+    for place in list(known_places):
+        if f" {place} " in padded:
+            prefetcher.prefetch(place)
+
+
+def extract_place(text: str, session: Session | None = None) -> str | None:
+    s = scan(text)
+    if refers_back_of(s):
+        return (session or default_session).last_place
+    return place_of(s)
 
 
 def extract_day(text: str) -> str | None:
-    t = text.lower()
-    if re.search(r"\btoday\b", t):
-        return "today"
-    if re.search(r"\btomorrow\b", t):
-        return "tomorrow"
-    for d in DAYS:
-        if re.search(rf"\b{d}\b", t):
-            return d
-    return None
+    return day_of(scan(text))
 
 
 def extract_next_n_days(text: str) -> int | None:
-    t = text.lower()
-
-    m = re.search(r"\bnext\s+(\d+)\s+days\b", t)
-    if m:
-        n = int(m.group(1))
-        return max(1, min(n, 7))
-
-    word_to_num = {
-        "one": 1,
-        "two": 2,
-        "three": 3,
-        "four": 4,
-        "five": 5,
-        "six": 6,
-        "seven": 7,
-    }
-    m = re.search(r"\bnext\s+(one|two|three|four|five|six|seven)\s+days\b", t)
-    if m:
-        return word_to_num[m.group(1)]
-
-    return None
+    return next_n_days_of(scan(text))
 
 
 def find_forecast_for_day(data: dict, day: str) -> dict | None:
@@ -72,6 +72,7 @@ def find_forecast_for_day(data: dict, day: str) -> dict | None:
     return None
 
 
+@traced("format")
 def format_item(place: str, item: dict) -> str:
     day = item["day"].strip()
     cond = item["weather"].strip()
@@ -81,46 +82,142 @@ def format_item(place: str, item: dict) -> str:
 
 
 def asked_condition(text: str) -> str | None:
-    t = text.lower()
-    if "will it snow" in t or re.search(r"\bsnow\b", t):
-        return "snow"
-    if "will it rain" in t or re.search(r"\brain\b", t):
-        return "rain"
-    if "cloud" in t:
-        return "clouds"
-    if "clear" in t:
-        return "clear sky"
-    if "mist" in t or "fog" in t:
-        return "mist"
-    if "thunder" in t or "storm" in t:
-        return "thunderstorm"
-    return None
+    return condition_of(scan(text))
+
+
+# (yes, no) replies for a single day, and the noun used in multi-day answers.
+CONDITION_REPLIES = {
+    "rain": ("Yes, expect rain.", "No, rain is not expected.", "rain"),
+    "snow": ("Yes, expect snow.", "No, snow is not expected.", "snow"),
+    "clouds": ("Yes, it will be cloudy.", "No, it won't be cloudy.", "clouds"),
+    "clear sky": ("Yes, it should be clear.", "No, it won't be clear.", "clear skies"),
+    "mist": ("Yes, expect mist.", "No, mist is not expected.", "mist"),
+    "thunderstorm": ("Yes, expect a thunderstorm.", "No thunderstorm expected.", "thunderstorms"),
+}
 
 
 def yes_no_for_condition(item: dict, cond: str) -> str:
     weather = item.get("weather", "").strip().lower()
-    if cond == "rain":
-        return "Yes, expect rain." if ("rain" in weather) else "No, rain is not expected."
-    if cond == "snow":
-        return "Yes, expect snow." if ("snow" in weather) else "No, snow is not expected."
-    if cond == "clouds":
-        return "Yes, it will be cloudy." if ("cloud" in weather) else "No, it won't be cloudy."
-    if cond == "clear sky":
-        return "Yes, it should be clear." if ("clear sky" in weather) else "No, it won't be clear."
-    if cond == "mist":
-        return "Yes, expect mist." if ("mist" in weather) else "No, mist is not expected."
-    if cond == "thunderstorm":
-        return "Yes, expect a thunderstorm." if ("thunderstorm" in weather) else "No thunderstorm expected."
-    return f"It looks like: {weather}."
-
-
-def handle_weather(text: str) -> str:
-    place = extract_place(text) or context.get("last_place") or "Marburg"
-    data = get_forecast(place)
-
-    n = extract_next_n_days(text)
+    if cond not in CONDITION_REPLIES:
+        return f"It looks like: {weather}."
+    yes, no, _ = CONDITION_REPLIES[cond]
+    return yes if condition_code(weather) & CONDITION_BITS[cond] else no
+
+
+def _join(words: list[str]) -> str:
+    return words[0] if len(words) == 1 else ", ".join(words[:-1]) + " and " + words[-1]
+
+
+def _on(days: list[str]) -> str:
+    # "tomorrow and on Friday", "on Saturday and Sunday"
+    first = days[0].lower()
+    if first in ("today", "tomorrow"):
+        return first + (" and on " + _join(days[1:]) if len(days) > 1 else "")
+    return "on " + _join(days)
+
+
+def _deg(value) -> str:
+    return f"{float(value):g}"
+
+
+def _day_column(table: ForecastTable, day: str | None) -> int:
+    if day == "tomorrow":
+        return 1 if len(table) > 1 else 0
+    if day and day != "today":
+        i = table.index_of(day)
+        return 0 if i is None else i
+    return 0
+
+
+def _extreme_reply(table: ForecastTable, extreme: str, start: int, n: int | None) -> tuple[str, int]:
+    if extreme == "warmest":
+        i = table.warmest(start, n)
+        return f"The warmest day in {table.place} is {table.days[i]}, up to {_deg(table.tmax[i])} degrees.", i
+    i = table.coldest(start, n)
+    return f"The coldest day in {table.place} is {table.days[i]}, down to {_deg(table.tmin[i])} degrees.", i
+
+
+def _handle_cities(slots: dict, session: Session) -> str:
+    tables = []
+    for place in slots["places"]:
+        data = forecast_cache.get(place)
+        known_places.add(data["place"].lower())
+        tables.append(table_for(data))
+    grid = ForecastGrid(tables)
+    places = grid.places
+
+    n = slots["next_n_days"]
     if n is not None:
-        items = data["forecast"][1:1+n] if len(data["forecast"]) > 1 else data["forecast"][:n]
+        start, label = (1 if len(tables[0]) > 1 else 0), f"in the next {n} days"
+    else:
+        start, n = _day_column(tables[0], slots["day"] or session.last_day), 1
+        label = _on([tables[0].days[start]]) if start < len(tables[0]) else ""
+        session.last_day = tables[0].days[start].lower() if label else session.last_day
+
+    session.last_place = places[0]
+    prefetch_followups(session)
+
+    extreme = slots["extreme"]
+    if extreme:
+        found = grid.warmest(start, n) if extreme == "warmest" else grid.coldest(start, n)
+        if found is None:
+            return "I don't have a forecast for that."
+        row, col = found
+        temp = grid.tmax[row, col] if extreme == "warmest" else grid.tmin[row, col]
+        return f"The {extreme} is {places[row]} {_on([tables[row].days[col]])}, {_deg(temp)} degrees."
+
+    cond = slots["condition"]
+    if cond in CONDITION_REPLIES:
+        noun = CONDITION_REPLIES[cond][2]
+        hit = grid.has(cond, start, n).any(axis=1)
+        yes = [p for p, h in zip(places, hit) if h]
+        no = [p for p, h in zip(places, hit) if not h]
+        if not yes:
+            return f"No {noun} expected {label} in {_join(no)}."
+        reply = f"Expect {noun} {label} in {_join(yes)}."
+        return reply + (f" Not in {_join(no)}." if no else "")
+
+    lows, highs = grid.spans(start, n)
+    parts = [f"{p} {_deg(lo)} to {_deg(hi)} degrees" for p, lo, hi in zip(places, lows, highs)]
+    if n == 1 and start < len(tables[0]):
+        parts = [f"{part}, {t.weather[start]}" if start < len(t) else part for part, t in zip(parts, tables)]
+    return f"Forecast {label}: " + "; ".join(parts) + "."
+
+
+def handle_weather(text: str, session: Session | None = None) -> str:
+    session = session or default_session
+    slots = parse(text, intent="weather").slots
+
+    if slots["places"]:
+        return _handle_cities(slots, session)
+
+    place = session.last_place if slots["refers_back"] else slots["place"]
+    place = place or session.last_place or "Marburg"
+    data = forecast_cache.get(place)
+    known_places.add(data["place"].lower())
+    forecast = data["forecast"]
+
+    n = slots["next_n_days"]
+    if n is not None:
+        start = 1 if len(forecast) > 1 else 0
+        items = forecast[start:start + n]
+        session.last_place = data["place"]
+        session.last_day = items[-1]["day"].strip().lower()
+        prefetch_followups(session)
+
+        if slots["extreme"]:
+            reply, i = _extreme_reply(table_for(data), slots["extreme"], start, n)
+            session.last_day = forecast[i]["day"].strip().lower()
+            return reply
+
+        cond = slots["condition"]
+        if cond in CONDITION_REPLIES:
+            noun = CONDITION_REPLIES[cond][2]
+            days = table_for(data).days_with(cond, start, n)
+            if days:
+                return f"Yes, expect {noun} in {data['place']} {_on(days)}."
+            return f"No {noun} expected in {data['place']} in the next {n} days."
+
         parts = []
         for it in items:
             day = it["day"].strip()
@@ -128,24 +225,28 @@ def handle_weather(text: str) -> str:
             tmin = it["temperature"]["min"]
             tmax = it["temperature"]["max"]
             parts.append(f"{day}: {cond}, {tmin} to {tmax} degrees.")
-        context["last_place"] = data["place"]
-        context["last_day"] = items[-1]["day"].strip().lower()
         return f"Forecast for the next {n} days in {data['place']}: " + " ".join(parts)
 
-    requested_day = extract_day(text) or context.get("last_day")
-    default_item = data["forecast"][0]
+    if slots["extreme"]:
+        reply, i = _extreme_reply(table_for(data), slots["extreme"], 0, None)
+        session.last_place = data["place"]
+        session.last_day = forecast[i]["day"].strip().lower()
+        prefetch_followups(session)
+        return reply
 
+    requested_day = slots["day"] or session.last_day
     if requested_day == "tomorrow":
-        item = data["forecast"][1] if len(data["forecast"]) > 1 else default_item
-    elif requested_day and requested_day not in ["today"]:
-        item = find_forecast_for_day(data, requested_day) or default_item
+        item = forecast[1] if len(forecast) > 1 else forecast[0]
+    elif requested_day and requested_day != "today":
+        item = find_forecast_for_day(data, requested_day) or forecast[0]
     else:
-        item = default_item
+        item = forecast[0]
 
-    context["last_place"] = data["place"]
-    context["last_day"] = item["day"].strip().lower()
+    session.last_place = data["place"]
+    session.last_day = item["day"].strip().lower()
+    prefetch_followups(session)
 
-    cond = asked_condition(text)
+    cond = slots["condition"]
     if cond:
         return f"{format_item(data['place'], item)} {yes_no_for_condition(item, cond)}"
 